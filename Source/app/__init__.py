@@ -487,6 +487,8 @@ def create_app():
             app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_path}".replace('\\', '/')
 
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    # Bound executemany batches (bulk audit/log inserts) to 1000 rows per statement
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {"insertmanyvalues_page_size": 1000}
 
     # Configure file logging
     import logging
@@ -556,6 +558,7 @@ def create_app():
                 ensure_role_tables,
                 ensure_email_outbox_table,
                 ensure_ai_tables,
+                ensure_query_indexes,
             )
             ensure_ticket_columns(db.engine)
             ensure_user_columns(db.engine)
@@ -579,6 +582,7 @@ def create_app():
             ensure_role_tables(db.engine)
             ensure_email_outbox_table(db.engine)
             ensure_ai_tables(db.engine)
+            ensure_query_indexes(db.engine)
             # Ensure AssetAudit table (runtime lightweight migration with pre-backup for SQLite)
             from sqlalchemy import inspect
             insp = inspect(db.engine)
@@ -664,11 +668,12 @@ def create_app():
             current_key = app.config['SECRET_KEY']
             rotated = 0
             if current_key != 'dev':
+                readable = Setting.load_all_sensitive()
                 for key in SENSITIVE_SETTING_KEYS:
                     raw_val = Setting.get_raw(key)
                     if not (raw_val and is_encrypted(raw_val)):
                         continue
-                    if decrypt_value(raw_val, current_key):
+                    if readable.get(key):
                         continue  # already readable with the current key
                     legacy_plain = decrypt_value(raw_val, 'dev')
                     if legacy_plain:
@@ -903,6 +908,9 @@ def create_app():
                     now_local = _dt.now()
                 from . import db as _db
                 rows = ScheduledTicket.query.filter_by(active=True).all()
+                # Create all due tickets in one flush, then insert their checklist
+                # tasks with a single Core executemany (no per-task ORM objects).
+                created = []
                 for r in rows:
                     if _should_run(r, now_local):
                         # Avoid duplicate runs in same minute
@@ -928,11 +936,17 @@ def create_app():
                             source='scheduled'
                         )
                         _db.session.add(t)
-                        _db.session.flush()
-                        if r.tasks_text:
-                            for line in [ln.strip() for ln in r.tasks_text.splitlines() if ln.strip()]:
-                                _db.session.add(TicketTask(ticket_id=t.id, label=line))
+                        created.append((t, r.tasks_text))
                         r.last_run_at = now_local.replace(tzinfo=None)
+                if created:
+                    _db.session.flush()
+                    task_rows = [
+                        {'ticket_id': t.id, 'label': line}
+                        for t, tasks_text in created if tasks_text
+                        for line in [ln.strip() for ln in tasks_text.splitlines() if ln.strip()]
+                    ]
+                    if task_rows:
+                        _db.session.execute(_db.insert(TicketTask), task_rows)
                 _db.session.commit()
         try:
             scheduler.add_job(func=run_scheduled_tickets, trigger="interval", minutes=1, id="scheduled_tickets", replace_existing=True)
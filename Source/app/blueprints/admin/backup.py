@@ -1,7 +1,7 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request, send_file, current_app, jsonify, make_response, session
 from flask_login import login_required, current_user
 from ...forms import MSGraphForm, TechForm, ProcessTemplateForm, ProcessTemplateItemForm, AllowedDomainForm, DenyFilterForm, ClientApiForm
-from ...models import Setting, User, Role, ProcessTemplate, ProcessTemplateItem, AllowedDomain, DenyFilter, Vendor, PurchaseOrder, Company, ShippingLocation, DocumentCategory, AssetAudit, Asset, AssetCategory, AssetManufacturer, AssetCondition, AssetLocation, ScheduledTicket, Ticket, TicketTask, TicketStatus, Tag, Report, ReportRun, ApiToken, TicketNote, TicketAttachment, Contact, ApprovalRequest, Project, OrderItem, Document, EmailCheck, EmailCheckEntry, OutgoingEmail, EmailOutbox
+from ...models import clear_user_cache, Setting, User, Role, ProcessTemplate, ProcessTemplateItem, AllowedDomain, DenyFilter, Vendor, PurchaseOrder, Company, ShippingLocation, DocumentCategory, AssetAudit, Asset, AssetCategory, AssetManufacturer, AssetCondition, AssetLocation, ScheduledTicket, Ticket, TicketTask, TicketStatus, Tag, Report, ReportRun, ApiToken, TicketNote, TicketAttachment, Contact, ApprovalRequest, Project, OrderItem, Document, EmailCheck, EmailCheckEntry, OutgoingEmail, EmailOutbox
 from ... import db
 from ...permissions import (
     MODULES, LEVEL_CHOICES, VIEW, EDIT,
@@ -445,6 +445,7 @@ def restore_db():
         # Dispose connections
         db.session.remove()
         db.engine.dispose()
+        clear_user_cache()
         # Backup current DB
         backup_path = f"{db_path}.pre-restore-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}"
         try:
@@ -465,6 +466,7 @@ def restore_db():
                 ensure_documents_tables,
                 ensure_assets_table,
                 ensure_asset_picklists,
+                ensure_query_indexes,
             )
             ensure_ticket_columns(db.engine)
             ensure_user_columns(db.engine)
@@ -475,6 +477,7 @@ def restore_db():
             ensure_documents_tables(db.engine)
             ensure_assets_table(db.engine)
             ensure_asset_picklists(db.engine)
+            ensure_query_indexes(db.engine)
         except Exception:
             pass
         # Restore the paired encryption key if the backup carried one
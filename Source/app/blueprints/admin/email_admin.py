@@ -210,8 +210,11 @@ def email_template_delete():
 def password_notifications_list():
     """Return list of all password expiry notification rules as JSON."""
     from ...models import PasswordExpiryNotification, EmailTemplate
+    from sqlalchemy.orm import joinedload
     
-    notifications = PasswordExpiryNotification.query.order_by(PasswordExpiryNotification.days_before.desc()).all()
+    notifications = PasswordExpiryNotification.query.options(
+        joinedload(PasswordExpiryNotification.template)
+    ).order_by(PasswordExpiryNotification.days_before.desc()).all()
     templates = EmailTemplate.query.order_by(EmailTemplate.name).all()
     
     return jsonify({
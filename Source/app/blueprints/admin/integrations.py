@@ -286,7 +286,7 @@ def ad_settings():
 def ad_test():
     """Test the Active Directory connection using provided or saved settings."""
     try:
-        from ldap3 import Server, Connection, ALL, SUBTREE, Tls
+        from ldap3 import Connection, DSA, SUBTREE, Tls
         import ssl
     except ImportError:
         return jsonify({'success': False, 'message': 'ldap3 package not installed. Please run: pip install ldap3'})
@@ -316,15 +316,10 @@ def ad_test():
         if ad_use_ssl or ad_start_tls:
             tls_config = Tls(validate=ssl.CERT_NONE)  # For self-signed certs; in production, consider CERT_REQUIRED
         
-        # Create server object
-        server = Server(
-            ad_server,
-            port=ad_port,
-            use_ssl=ad_use_ssl,
-            tls=tls_config,
-            get_info=ALL,
-            connect_timeout=10
-        )
+        # Create server object (a failover pool if several DCs are listed);
+        # DSA info for the naming contexts shown below
+        from ...services.ad_password_check import _ad_server
+        server = _ad_server(ad_server, ad_port, ad_use_ssl, tls_config, get_info=DSA)
         
         # Create connection and bind
         conn = Connection(
@@ -359,8 +354,8 @@ def ad_test():
         
         # Get server info
         server_info = ''
-        if server.info:
-            naming_contexts = getattr(server.info, 'naming_contexts', None)
+        if conn.server.info:
+            naming_contexts = getattr(conn.server.info, 'naming_contexts', None)
             if naming_contexts:
                 server_info = f' Naming contexts: {", ".join(naming_contexts[:2])}...'
         
@@ -368,7 +363,7 @@ def ad_test():
         
         return jsonify({
             'success': True,
-            'message': f'Successfully connected and authenticated to {ad_server}:{ad_port}.{search_info}{server_info}'
+            'message': f'Successfully connected and authenticated to {conn.server.host}:{ad_port}.{search_info}{server_info}'
         })
         
     except Exception as e:
@@ -411,29 +406,33 @@ def ad_password_check_now():
     debug_mode = request.form.get('debug') in ('1', 'true', 'on', 'yes')
     debug_info = {} if debug_mode else None
     
+    from ...services.ad_password_check import (
+        _AD_EMAIL_CHUNK, _AD_SETTING_KEYS, _TRUTHY, _attr, _filetime_to_dt, _index_ad_users_by_email,
+        _max_pwd_age_days, _setting, _with_ad_conn,
+    )
+    
+    # Get AD settings (one query)
+    settings = Setting.get_many(_AD_SETTING_KEYS)
+    
     # Check if AD is configured
-    ad_enabled = (Setting.get('AD_ENABLED', '0') or '0') in ('1', 'true', 'on', 'yes')
-    if not ad_enabled:
+    if _setting(settings, 'AD_ENABLED', '0') not in _TRUTHY:
         return jsonify({'error': 'Active Directory is not enabled. Configure it in AD Connect first.'})
     
-    ad_server = Setting.get('AD_SERVER', '')
+    ad_server = _setting(settings, 'AD_SERVER', '')
     if not ad_server:
         return jsonify({'error': 'AD server is not configured.'})
     
     try:
-        from ldap3 import Server, Connection, ALL, SUBTREE, Tls
-        import ssl
+        from ldap3 import SUBTREE
     except ImportError:
         return jsonify({'error': 'ldap3 package not installed. Please run: pip install ldap3'})
     
-    # Get AD settings
-    ad_port = int(Setting.get('AD_PORT', '389') or '389')
-    ad_use_ssl = (Setting.get('AD_USE_SSL', '0') or '0') in ('1', 'true', 'on', 'yes')
-    ad_start_tls = (Setting.get('AD_START_TLS', '0') or '0') in ('1', 'true', 'on', 'yes')
-    ad_base_dn = Setting.get('AD_BASE_DN', '')
-    ad_bind_dn = Setting.get('AD_BIND_DN', '')
-    ad_bind_password = Setting.get('AD_BIND_PASSWORD', '')
-    warning_days = int(Setting.get('AD_PWD_WARNING_DAYS', '14') or '14')
+    ad_port = int(_setting(settings, 'AD_PORT', '389'))
+    ad_use_ssl = _setting(settings, 'AD_USE_SSL', '0') in _TRUTHY
+    ad_start_tls = _setting(settings, 'AD_START_TLS', '0') in _TRUTHY
+    ad_base_dn = _setting(settings, 'AD_BASE_DN', '')
+    ad_bind_dn = _setting(settings, 'AD_BIND_DN', '')
+    warning_days = int(_setting(settings, 'AD_PWD_WARNING_DAYS', '14'))
     
     if debug_mode:
         debug_info['settings'] = {
@@ -450,44 +449,18 @@ def ad_password_check_now():
         return jsonify({'error': 'AD Base DN is not configured.'})
     
     try:
-        # Configure TLS if needed
-        tls_config = None
-        if ad_use_ssl or ad_start_tls:
-            tls_config = Tls(validate=ssl.CERT_NONE)
-        
-        # Create server and connection
-        server = Server(
-            ad_server,
-            port=ad_port,
-            use_ssl=ad_use_ssl,
-            tls=tls_config,
-            get_info=ALL,
-            connect_timeout=10
-        )
-        
-        conn = Connection(
-            server,
-            user=ad_bind_dn,
-            password=ad_bind_password,
-            auto_bind=False,
-            raise_exceptions=True
-        )
-        
-        if ad_start_tls and not ad_use_ssl:
-            conn.open()
-            conn.start_tls()
-        
-        if not conn.bind():
-            return jsonify({'error': f'Failed to bind to AD: {conn.result}'})
-        
         # Get all contacts with email addresses (non-archived)
         # Include contacts where archived is False OR NULL (for older records without this field set)
-        from sqlalchemy import or_
-        contacts = Contact.query.filter(
-            Contact.email.isnot(None),
-            Contact.email != '',
-            or_(Contact.archived == False, Contact.archived.is_(None))
+        # Plain (id, name, email) rows; results are written back in one bulk UPDATE
+        from sqlalchemy import or_, update as sa_update
+        contacts = db.session.execute(
+            db.select(Contact.id, Contact.name, Contact.email).where(
+                Contact.email.isnot(None),
+                Contact.email != '',
+                or_(Contact.archived == False, Contact.archived.is_(None))
+            )
         ).all()
+        contact_updates = []
         
         results = []
         found_count = 0
@@ -496,28 +469,27 @@ def ad_password_check_now():
         
         from datetime import datetime, timedelta
         
-        # Get domain max password age from AD (default to 90 days if not found)
-        max_pwd_age_days = 90
-        try:
-            # Query the domain policy for maxPwdAge
-            conn.search(
-                search_base=ad_base_dn,
-                search_filter='(objectClass=domain)',
-                search_scope=SUBTREE,
-                attributes=['maxPwdAge']
-            )
-            if conn.entries:
-                max_pwd_age = conn.entries[0].maxPwdAge.value
-                if max_pwd_age:
-                    # maxPwdAge is in 100-nanosecond intervals (negative value)
-                    # Convert to days
-                    max_pwd_age_days = abs(int(max_pwd_age)) / (10000000 * 60 * 60 * 24)
-        except Exception:
-            pass  # Use default if we can't get the policy
+        # Domain max password age, then every contact address looked up at
+        # once (chunked OR filters) on the shared AD connection instead of
+        # one search round trip per contact
+        emails = [c.email.strip().lower() for c in contacts]
+        
+        def read_directory(conn):
+            # Manual check: re-read the domain policy (also refreshes the job's cache)
+            max_age = _max_pwd_age_days(conn, ad_base_dn, SUBTREE, refresh=True)
+            return max_age, _index_ad_users_by_email(conn, ad_base_dn, SUBTREE, emails), str(conn.result)
+        max_pwd_age_days, ad_users, search_result = _with_ad_conn(settings, read_directory)
         
         if debug_mode:
-            debug_info['searches'] = []
+            debug_info['searches'] = {
+                'search_base': ad_base_dn,
+                'emails': len(set(emails)),
+                'chunk_size': _AD_EMAIL_CHUNK,
+                'addresses_matched': len(ad_users),
+                'result': search_result,
+            }
         
+        checked_at = datetime.utcnow()
         for contact in contacts:
             email = contact.email.strip().lower()
             user_result = {
@@ -532,70 +504,27 @@ def ad_password_check_now():
                 'never_expires': False
             }
             
-            # Escape special LDAP characters in email
-            from ldap3.utils.conv import escape_filter_chars
-            escaped_email = escape_filter_chars(email)
-            
-            # Search for user by multiple email-related attributes
-            # mail: primary email, userPrincipalName: UPN (often email format), proxyAddresses: all email aliases
-            search_filter = f'(|(mail={escaped_email})(userPrincipalName={escaped_email})(proxyAddresses=smtp:{escaped_email})(proxyAddresses=SMTP:{escaped_email}))'
-            
-            if debug_mode:
-                search_debug = {
-                    'contact_email': email,
-                    'escaped_email': escaped_email,
-                    'search_filter': search_filter,
-                    'search_base': ad_base_dn,
-                }
-            
-            conn.search(
-                search_base=ad_base_dn,
-                search_filter=search_filter,
-                search_scope=SUBTREE,
-                attributes=['sAMAccountName', 'userPrincipalName', 'pwdLastSet', 'userAccountControl', 'mail', 'cn', 'proxyAddresses']
-            )
-            
-            if debug_mode:
-                search_debug['entries_found'] = len(conn.entries)
-                search_debug['result'] = str(conn.result)
-                if conn.entries:
-                    # Show first entry details
-                    entry = conn.entries[0]
-                    search_debug['first_entry'] = {
-                        'dn': str(entry.entry_dn),
-                        'cn': str(entry.cn) if hasattr(entry, 'cn') else None,
-                        'mail': str(entry.mail) if hasattr(entry, 'mail') and entry.mail else None,
-                        'userPrincipalName': str(entry.userPrincipalName) if hasattr(entry, 'userPrincipalName') and entry.userPrincipalName else None,
-                        'sAMAccountName': str(entry.sAMAccountName) if hasattr(entry, 'sAMAccountName') and entry.sAMAccountName else None,
-                    }
-                debug_info['searches'].append(search_debug)
-            
-            if conn.entries:
-                entry = conn.entries[0]
+            pwd_set_date = expiry_date_naive = None
+            attributes = ad_users.get(email)
+            if attributes is not None:
                 user_result['found_in_ad'] = True
                 found_count += 1
                 
                 # Get username
-                user_result['ad_username'] = str(entry.sAMAccountName) if hasattr(entry, 'sAMAccountName') and entry.sAMAccountName else None
+                user_result['ad_username'] = _attr(attributes, 'sAMAccountName') or None
                 
                 # Check if password never expires (bit 65536 in userAccountControl)
-                uac = int(entry.userAccountControl.value) if hasattr(entry, 'userAccountControl') and entry.userAccountControl.value else 0
+                uac = int(_attr(attributes, 'userAccountControl') or 0)
                 if uac & 0x10000:  # DONT_EXPIRE_PASSWORD flag
                     user_result['never_expires'] = True
                 else:
                     # Calculate password expiry
-                    pwd_last_set = entry.pwdLastSet.value if hasattr(entry, 'pwdLastSet') and entry.pwdLastSet.value else None
+                    pwd_last_set = _attr(attributes, 'pwdLastSet') or None
                     
                     if pwd_last_set:
-                        # pwdLastSet is a datetime in ldap3
-                        if isinstance(pwd_last_set, datetime):
-                            pwd_set_date = pwd_last_set
-                        else:
-                            # If it's a Windows FILETIME (100-nanosecond intervals since 1601)
-                            try:
-                                pwd_set_date = datetime(1601, 1, 1) + timedelta(microseconds=int(pwd_last_set) / 10)
-                            except Exception:
-                                pwd_set_date = None
+                        pwd_set_date = _filetime_to_dt(pwd_last_set)
+                        if pwd_set_date and pwd_set_date.tzinfo is not None:
+                            pwd_set_date = pwd_set_date.replace(tzinfo=None)
                         
                         if pwd_set_date:
                             expiry_date = pwd_set_date + timedelta(days=max_pwd_age_days)
@@ -618,25 +547,28 @@ def ad_password_check_now():
                                 user_result['is_expiring_soon'] = True
                                 expiring_soon_count += 1
             
-            # Save password expiry data to Contact record
-            now = datetime.utcnow()
+            # Queue password expiry data for the Contact record
             if not user_result['found_in_ad']:
-                contact.password_expires_days = -999  # Not found in AD
+                password_expires_days = -999  # Not found in AD
             elif user_result['never_expires']:
-                contact.password_expires_days = -1  # Never expires
-            elif user_result['days_until_expiry'] is not None:
-                contact.password_expires_days = user_result['days_until_expiry']
+                password_expires_days = -1  # Never expires
             else:
-                contact.password_expires_days = None  # Could not determine
-            contact.password_checked_at = now
+                password_expires_days = user_result['days_until_expiry']  # None if undetermined
+            contact_updates.append({
+                'id': contact.id,
+                'password_expires_days': password_expires_days,
+                'password_checked_at': checked_at,
+                'password_last_set_at': pwd_set_date,
+                'password_expires_at': expiry_date_naive,
+            })
             
             results.append(user_result)
         
-        # Commit all Contact updates
+        # Write all Contact updates as one executemany UPDATE keyed by id
+        if contact_updates:
+            db.session.execute(sa_update(Contact), contact_updates)
         db.session.commit()
         
-        conn.unbind()
-        
         # Sort results: expired first, then expiring soon, then not found, then OK
         def sort_key(r):
             if r['is_expired']:
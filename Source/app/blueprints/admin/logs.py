@@ -382,7 +382,7 @@ def cleanup_old_email_logs(app):
     """Delete email logs older than the configured retention period."""
     with app.app_context():
         from datetime import timedelta
-        from ...models import EmailCheck, EmailCheckEntry, OutgoingEmail, Setting as _Setting
+        from ...models import EmailCheck, OutgoingEmail, Setting as _Setting
         enabled = (_Setting.get('EMAIL_LOG_RETENTION_ENABLED', '0') or '0') in ('1', 'true', 'on', 'yes')
         if not enabled:
             return
@@ -393,8 +393,6 @@ def cleanup_old_email_logs(app):
         cutoff = datetime.utcnow() - timedelta(days=days)
         # Delete old outgoing emails
         OutgoingEmail.query.filter(OutgoingEmail.created_at < cutoff).delete(synchronize_session=False)
-        # Delete old email check entries (cascade will handle entries via EmailCheck)
-        old_checks = EmailCheck.query.filter(EmailCheck.checked_at < cutoff).all()
-        for check in old_checks:
-            db.session.delete(check)
+        # Delete old email checks and their entries
+        EmailCheck.delete_older_than(cutoff)
         db.session.commit()
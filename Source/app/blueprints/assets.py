@@ -6,6 +6,7 @@ from ..permissions import CREATE, EDIT, DELETE, require_permission, protect_blue
 import csv
 import io
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import undefer_group
 from datetime import datetime
 from types import SimpleNamespace
 from flask_login import current_user
@@ -172,7 +173,7 @@ def new():
 @assets_bp.route('/<int:asset_id>')
 @login_required
 def detail(asset_id):
-    a = Asset.query.get_or_404(asset_id)
+    a = Asset.query.options(undefer_group('details')).get_or_404(asset_id)
     contacts = Contact.query.order_by(Contact.name.asc()).limit(500).all()
     # Locations list for modal defaults/selects
     locations = AssetLocation.query.order_by(AssetLocation.name.asc()).all()
@@ -298,17 +299,19 @@ def edit(asset_id):
             a.eol_date = parse_date(form.get('eol_date')) if form.get('eol_date') else None
             db.session.commit()
             # Write audits after commit of base changes
-            for field, old_val, new_val in changes:
-                audit = AssetAudit(
-                    asset_id=a.id,
-                    user_id=getattr(current_user, 'id', None),
-                    action='edit',
-                    field=field,
-                    old_value=str(old_val) if old_val is not None else None,
-                    new_value=str(new_val) if new_val is not None else None
-                )
-                db.session.add(audit)
             if changes:
+                user_id = getattr(current_user, 'id', None)
+                AssetAudit.bulk_log([
+                    {
+                        'asset_id': a.id,
+                        'user_id': user_id,
+                        'action': 'edit',
+                        'field': field,
+                        'old_value': str(old_val) if old_val is not None else None,
+                        'new_value': str(new_val) if new_val is not None else None,
+                    }
+                    for field, old_val, new_val in changes
+                ])
                 db.session.commit()
             flash('Asset updated.', 'success')
             return redirect(url_for('assets.detail', asset_id=a.id))
@@ -412,9 +415,9 @@ def import_csv():
             name = (row.get('Asset Name') or '').strip() or 'Unnamed Asset'
             existing = None
             if asset_tag:
-                existing = Asset.query.filter_by(asset_tag=asset_tag).first()
+                existing = Asset.query.filter(db.func.lower(Asset.asset_tag) == asset_tag.lower()).first()
             if not existing and serial:
-                existing = Asset.query.filter_by(serial_number=serial).first()
+                existing = Asset.query.filter(db.func.lower(Asset.serial_number) == serial.lower()).first()
             target = existing or Asset()
             target.source_id = legacy_id
             target.company = row.get('Company') or None
@@ -495,15 +498,18 @@ def bulk_checkin_contact(contact_id):
         flash('No assets assigned to user.', 'info')
         return redirect(url_for('users.show_user', contact_id=contact_id))
     changed = 0
+    user_id = getattr(current_user, 'id', None)
+    audits = []
     for a in assets:
         prev_assigned = a.assigned_contact_id
         prev_status = a.status or ''
         a.checkin()
         # Log audit entry for each asset (same as individual checkin)
-        db.session.add(AssetAudit(asset_id=a.id, user_id=getattr(current_user,'id',None), action='checkin', field='assigned_contact_id', old_value=str(prev_assigned) if prev_assigned else None, new_value=None))
+        audits.append({'asset_id': a.id, 'user_id': user_id, 'action': 'checkin', 'field': 'assigned_contact_id', 'old_value': str(prev_assigned) if prev_assigned else None, 'new_value': None})
         if (a.status or '') != prev_status:
-            db.session.add(AssetAudit(asset_id=a.id, user_id=getattr(current_user,'id',None), action='status_change', field='status', old_value=prev_status or None, new_value=a.status or None))
+            audits.append({'asset_id': a.id, 'user_id': user_id, 'action': 'status_change', 'field': 'status', 'old_value': prev_status or None, 'new_value': a.status or None})
         changed += 1
+    AssetAudit.bulk_log(audits)
     db.session.commit()
     flash(f'Checked in {changed} asset(s).', 'success')
     next_url = request.form.get('next')
@@ -521,7 +527,11 @@ def export_csv():
     ]
     writer = csv.DictWriter(output, fieldnames=fieldnames)
     writer.writeheader()
-    for a in Asset.query.order_by(Asset.id.asc()).all():
+    # Plain column rows (tuples with attribute access) rather than ORM
+    # instances: the export only reads columns, and this skips building an
+    # identity-mapped object with a __dict__ for every asset.
+    rows = db.session.execute(db.select(*Asset.__table__.columns).order_by(Asset.id.asc()))
+    for a in rows:
         writer.writerow({
             'ID': a.source_id or a.id,
             'Company': a.company or '',
@@ -13,12 +13,12 @@ import json
 from datetime import datetime
 from pathlib import Path
 
-import bleach
 from flask import Blueprint, request, jsonify, current_app, url_for
 from werkzeug.exceptions import RequestEntityTooLarge
 
 from .. import db, csrf
 from ..models import Setting, Ticket, TicketAttachment, ApiToken, Contact
+from ..utils.html_sanitize import plain_text_to_html
 
 client_api_bp = Blueprint('client_api', __name__, url_prefix='/api')
 
@@ -38,13 +38,6 @@ def _setting_bool(key: str, default: str = '0') -> bool:
     return (Setting.get(key, default) or default).strip().lower() in _TRUE_VALUES
 
 
-def _set_target_rel(attrs, new=False):
-    """Linkify callback: open links in a new tab safely (mirrors email_poll)."""
-    attrs[(None, 'target')] = '_blank'
-    attrs[(None, 'rel')] = 'noopener noreferrer'
-    return attrs
-
-
 def _authenticate(req):
     """Return (ok, token_or_none). Honors the admin-selected scheme.
 
@@ -77,7 +70,7 @@ def _render_body(description: str, sysinfo: dict) -> str:
     parts = []
     desc = (description or '').strip()
     if desc:
-        parts.append(bleach.linkify(_html.escape(desc).replace('\n', '<br>'), callbacks=[_set_target_rel]))
+        parts.append(plain_text_to_html(desc))
 
     sysinfo = sysinfo or {}
 
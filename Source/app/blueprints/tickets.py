@@ -42,7 +42,7 @@ def list_tickets():
     tag_id = request.args.get('tag_id', type=int)
 
     me_id = getattr(current_user, 'id', -1)
-    base = Ticket.query.options(joinedload(Ticket.assignee), joinedload(Ticket.co_assignee), joinedload(Ticket.project))
+    base = Ticket.query.options(joinedload(Ticket.project))
     # Project tickets live only under their project; merged tickets only under
     # their parent ticket. Neither ever appears in the main ticket list.
     query = base.filter(Ticket.project_id.is_(None), Ticket.merged_into_id.is_(None))
@@ -832,7 +832,12 @@ def show_ticket(ticket_id):
     # Contacts for requester autocomplete (limit to 500 for performance)
     contacts = Contact.query.order_by(Contact.name.asc()).limit(500).all()
     # Get approval requests for this ticket
-    approval_requests = ApprovalRequest.query.filter_by(ticket_id=t.id).order_by(ApprovalRequest.created_at.desc()).all()
+    approval_requests = (
+        ApprovalRequest.query.filter_by(ticket_id=t.id)
+        .options(joinedload(ApprovalRequest.manager_contact))
+        .order_by(ApprovalRequest.created_at.desc())
+        .all()
+    )
     
     # Check if current user is watching this ticket
     from ..models import TicketWatcher
@@ -949,7 +954,7 @@ def get_approval_data(ticket_id):
     # Find the requester contact
     contact = None
     if t.requester_email:
-        contact = Contact.query.filter_by(email=t.requester_email.lower()).first()
+        contact = Contact.query.options(joinedload(Contact.manager)).filter_by(email=t.requester_email.lower()).first()
     
     # Get order items
     order_items = OrderItem.query.filter_by(ticket_id=t.id).order_by(OrderItem.created_at.desc()).all()
@@ -1,9 +1,58 @@
 import hashlib
 import json
 import secrets
+import time
 from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+from flask import g, has_request_context
 from flask_login import UserMixin
+from sqlalchemy import bindparam, cast, event, func, inspect as sa_inspect, text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import Session, make_transient_to_detached, validates
+from sqlalchemy.sql.expression import FunctionElement
+from sqlalchemy.types import Float, Numeric
 from . import db, login_manager
+from .utils.security import SENSITIVE_SETTING_KEYS, decrypt_many, decrypt_value, encrypt_value
+
+
+def request_utcnow() -> datetime:
+    """datetime.utcnow(), frozen for the duration of the current request.
+
+    List pages read age/snooze properties for every row; one clock read per
+    request keeps them consistent and cheap. Outside a request (scheduler
+    jobs hold long-lived app contexts) this is plain utcnow().
+    """
+    if not has_request_context():
+        return datetime.utcnow()
+    now = g.get('_request_utcnow')
+    if now is None:
+        now = g._request_utcnow = datetime.utcnow()
+    return now
+
+
+def _round2(value: float) -> float:
+    """Round to 2 places half away from zero, like SQL ROUND() (Python's round() is half-even)."""
+    return float(Decimal(value).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP))
+
+
+class seconds_between(FunctionElement):
+    """SQL expression: seconds elapsed from `start` to `end` (both DATETIME)."""
+    type = Float()
+    inherit_cache = True
+    name = 'seconds_between'
+
+
+@compiles(seconds_between)
+def _seconds_between_sqlite(element, compiler, **kw):
+    start, end = list(element.clauses)
+    return '((julianday(%s) - julianday(%s)) * 86400.0)' % (compiler.process(end, **kw), compiler.process(start, **kw))
+
+
+@compiles(seconds_between, 'postgresql')
+def _seconds_between_pg(element, compiler, **kw):
+    start, end = list(element.clauses)
+    return 'EXTRACT(EPOCH FROM (%s - %s))' % (compiler.process(end, **kw), compiler.process(start, **kw))
 
 class Setting(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -12,12 +61,11 @@ class Setting(db.Model):
 
     @staticmethod
     def get(key: str, default=None):
-        s = Setting.query.filter_by(key=key).first()
+        s = Setting._lookup(key)
         if not s:
             return default
         value = s.value
         # Automatically decrypt sensitive settings
-        from .utils.security import SENSITIVE_SETTING_KEYS, decrypt_value
         if key in SENSITIVE_SETTING_KEYS and value:
             value = decrypt_value(value)
         return value if value else default
@@ -25,10 +73,9 @@ class Setting(db.Model):
     @staticmethod
     def set(key: str, value: str):
         # Automatically encrypt sensitive settings
-        from .utils.security import SENSITIVE_SETTING_KEYS, encrypt_value
         if key in SENSITIVE_SETTING_KEYS and value:
             value = encrypt_value(value)
-        s = Setting.query.filter_by(key=key).first()
+        s = Setting._lookup(key)
         if not s:
             s = Setting(key=key, value=value)
             db.session.add(s)
@@ -36,12 +83,59 @@ class Setting(db.Model):
             s.value = value
         db.session.commit()
 
+    @staticmethod
+    def set_many(values: dict):
+        """Set several keys in one query and one commit, encrypting as in set()."""
+        values = {
+            key: encrypt_value(value) if key in SENSITIVE_SETTING_KEYS and value else value
+            for key, value in values.items()
+        }
+        existing = Setting.query.filter(Setting.key.in_(list(values))).all()
+        for s in existing:
+            s.value = values.pop(s.key)
+        for key, value in values.items():
+            db.session.add(Setting(key=key, value=value))
+        db.session.commit()
+
     @staticmethod
     def get_raw(key: str, default=None):
         """Get the raw (possibly encrypted) value without decryption."""
-        s = Setting.query.filter_by(key=key).first()
+        s = Setting._lookup(key)
         return s.value if s else default
 
+    @staticmethod
+    def get_many(keys) -> dict:
+        """{key: value} for the stored keys among `keys`, in one query.
+
+        Sensitive values are decrypted as in get(); missing keys are absent.
+        """
+        rows = db.session.execute(
+            db.select(Setting.key, Setting.value).where(Setting.key.in_(list(keys)))
+        ).all()
+        values = {}
+        for key, value in rows:
+            if key in SENSITIVE_SETTING_KEYS and value:
+                value = decrypt_value(value)
+            values[key] = value
+        return values
+
+    @staticmethod
+    def load_all_sensitive() -> dict:
+        """Decrypted values of every stored sensitive setting, in one query."""
+        rows = db.session.execute(
+            db.select(Setting.key, Setting.value).where(Setting.key.in_(SENSITIVE_SETTING_KEYS))
+        ).all()
+        return dict(zip([k for k, _ in rows], decrypt_many([v for _, v in rows])))
+
+    @staticmethod
+    def _lookup(key: str):
+        return db.session.execute(_SETTING_BY_KEY, {'key': key}).scalar_one_or_none()
+
+
+# Built once so every settings read reuses the same statement (and its
+# compiled-cache entry) instead of constructing a new Query per call.
+_SETTING_BY_KEY = db.select(Setting).where(Setting.key == bindparam('key'))
+
 
 class Role(db.Model):
     """A named set of per-module access levels (see app/permissions.py).
@@ -125,9 +219,54 @@ class User(UserMixin, db.Model):
         return self.role == 'admin'
 
 
+# Per-process cache of User column values for the login loader, so an
+# authenticated request doesn't pay a SELECT just to resolve current_user.
+# Local writes invalidate immediately (events below); other workers and the
+# scheduler process see changes within _USER_CACHE_TTL seconds.
+_USER_CACHE_TTL = 30.0
+_USER_CACHE_MAX = 1024
+_user_cache: dict = {}
+
+
+def clear_user_cache(user_id=None):
+    """Drop one cached user, or all of them when user_id is None."""
+    if user_id is None:
+        _user_cache.clear()
+    else:
+        _user_cache.pop(user_id, None)
+
+
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    try:
+        uid = int(user_id)
+    except (TypeError, ValueError):
+        return None
+    now = time.monotonic()
+    hit = _user_cache.get(uid)
+    if hit is not None and hit[0] > now:
+        # Rebuild a detached instance from the cached columns and attach it
+        # without a round trip; relationships (role_obj) still lazy-load.
+        user = User(**hit[1])
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+    user = db.session.get(User, uid)
+    if user is None:
+        _user_cache.pop(uid, None)
+        return None
+    if len(_user_cache) >= _USER_CACHE_MAX:
+        _user_cache.clear()
+    _user_cache[uid] = (
+        now + _USER_CACHE_TTL,
+        {attr.key: getattr(user, attr.key) for attr in sa_inspect(User).column_attrs},
+    )
+    return user
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _invalidate_cached_user(mapper, connection, target):
+    clear_user_cache(target.id)
 
 
 class ApiToken(db.Model):
@@ -163,7 +302,13 @@ class ApiToken(db.Model):
         """Return the matching active token row, or None. Updates nothing."""
         if not plaintext:
             return None
-        return cls.query.filter_by(token_hash=cls._hash(plaintext), revoked=False).first()
+        return db.session.execute(_ACTIVE_TOKEN_BY_HASH, {'token_hash': cls._hash(plaintext)}).scalar_one_or_none()
+
+
+# Checked on every client-API request; built once like _SETTING_BY_KEY.
+_ACTIVE_TOKEN_BY_HASH = db.select(ApiToken).where(
+    ApiToken.token_hash == bindparam('token_hash'), ApiToken.revoked.is_(False)
+)
 
 
 # --- Tag System ---
@@ -240,6 +385,11 @@ class Ticket(db.Model):
     assignee = db.relationship('User', foreign_keys=[assignee_id])
     co_assignee_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
     co_assignee = db.relationship('User', foreign_keys=[co_assignee_id])
+    # Denormalized User.name copies so list pages never join the user table.
+    # Stamped on flush when the assignment changes; renames fan out via an
+    # after_update event on User (see _stamp_assignee_names below).
+    assignee_name_cached = db.Column(db.String(120), nullable=True)
+    co_assignee_name_cached = db.Column(db.String(120), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     closed_at = db.Column(db.DateTime, nullable=True)
@@ -261,19 +411,47 @@ class Ticket(db.Model):
     merged_into_id = db.Column(db.Integer, db.ForeignKey('ticket.id'), nullable=True)
     merged_at = db.Column(db.DateTime, nullable=True)
 
-    @property
+    # List/dashboard filters (status, snooze) ordered by created_at, over
+    # "live" tickets only: project and merged tickets never appear in lists,
+    # so the partial index leaves them out. Snooze/closed can't go in the
+    # predicate (now() isn't allowed; closed statuses are DB rows). Plus the
+    # "my tickets" view. Existing DBs get these from ensure_query_indexes().
+    __table_args__ = (
+        db.Index(
+            'ix_ticket_live', 'status', 'snoozed_until', 'created_at',
+            sqlite_where=text('project_id IS NULL AND merged_into_id IS NULL'),
+            postgresql_where=text('project_id IS NULL AND merged_into_id IS NULL'),
+        ),
+        db.Index('ix_ticket_assignee_status', 'assignee_id', 'status'),
+    )
+
+    # Age runs from opened to closed for closed tickets, else to now. Every
+    # reopen path clears closed_at, so closed_at alone decides -- the Python
+    # getters and the SQL expressions (ORDER BY/WHERE) must compute the same
+    # value, and the SQL side can't consult the status table per row.
+    def _age_seconds(self) -> float:
+        end_time = self.closed_at or request_utcnow()
+        return (end_time - self.created_at).total_seconds()
+
+    @classmethod
+    def _age_seconds_sql(cls):
+        return seconds_between(cls.created_at, func.coalesce(cls.closed_at, func.current_timestamp()))
+
+    @hybrid_property
     def age_hours(self) -> float:
-        # For closed tickets, calculate age from opened to closed, not to current time
-        end_time = self.closed_at if self.is_closed and self.closed_at else datetime.utcnow()
-        delta = (end_time - self.created_at)
-        return round(delta.total_seconds() / 3600.0, 2)
+        return _round2(self._age_seconds() / 3600.0)
 
-    @property
+    @age_hours.expression
+    def age_hours(cls):
+        return func.round(cast(cls._age_seconds_sql() / 3600.0, Numeric), 2)
+
+    @hybrid_property
     def age_days(self) -> float:
-        # For closed tickets, calculate age from opened to closed, not to current time
-        end_time = self.closed_at if self.is_closed and self.closed_at else datetime.utcnow()
-        delta = (end_time - self.created_at)
-        return round(delta.total_seconds() / 86400.0, 2)
+        return _round2(self._age_seconds() / 86400.0)
+
+    @age_days.expression
+    def age_days(cls):
+        return func.round(cast(cls._age_seconds_sql() / 86400.0, Numeric), 2)
 
     @property
     def is_closed(self) -> bool:
@@ -283,7 +461,7 @@ class Ticket(db.Model):
     @property
     def is_snoozed(self) -> bool:
         try:
-            return bool(self.snoozed_until and self.snoozed_until > datetime.utcnow())
+            return bool(self.snoozed_until and self.snoozed_until > request_utcnow())
         except Exception:
             return False
 
@@ -530,6 +708,8 @@ class Contact(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(255), nullable=True)
     email = db.Column(db.String(255), unique=True, nullable=False)
+    # Case-insensitive lookups (lower(email) == ...) probe this instead of scanning
+    __table_args__ = (db.Index('ix_contact_email_lower', func.lower(email)),)
     notes = db.Column(db.Text, nullable=True)
     inventory_url = db.Column(db.String(1000), nullable=True)
     ninja_url = db.Column(db.String(1000), nullable=True)
@@ -541,6 +721,8 @@ class Contact(db.Model):
     # AD Password expiry tracking
     password_expires_days = db.Column(db.Integer, nullable=True)  # Days until password expires (null=not checked, -1=never expires, negative=expired)
     password_checked_at = db.Column(db.DateTime, nullable=True)  # Last time password expiry was checked
+    password_last_set_at = db.Column(db.DateTime, nullable=True)  # AD pwdLastSet (UTC) as of the last check
+    password_expires_at = db.Column(db.DateTime, nullable=True)  # pwdLastSet + domain maxPwdAge (UTC); null unless it expires
     password_notification_sent_at = db.Column(db.DateTime, nullable=True)  # Last time a password expiry notification was sent
     last_notification_days_before = db.Column(db.Integer, nullable=True)  # The days_before tier of the last notification sent
     ad_disabled = db.Column(db.Boolean, nullable=True)  # True if AD account is disabled, None if not checked
@@ -552,6 +734,12 @@ class Contact(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    @validates('email')
+    def _normalize_email(self, key, value):
+        # Stored trimmed and lowercased so exact-match lookups and the AD
+        # email index agree regardless of how the address was typed
+        return value.strip().lower() if value else value
+
 
 # --- Approval Requests ---
 class ApprovalRequest(db.Model):
@@ -662,6 +850,12 @@ class PurchaseOrder(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     ordered_at = db.Column(db.DateTime, nullable=True)  # when status transitioned to sent
     notes = db.Column(db.Text, nullable=True)
+    # Denormalized totals, recomputed in SQL after every flush that touches the
+    # PO, its items, or its shipping location (see _refresh_po_totals below).
+    # NULL on legacy rows until first recompute; the properties fall back to a live sum.
+    subtotal_cached = db.Column(db.Float, default=0.0)
+    tax_cached = db.Column(db.Float, default=0.0)
+    grand_total_cached = db.Column(db.Float, default=0.0)
 
     # Relationship to items
     items = db.relationship('OrderItem', backref='purchase_order', cascade='all, delete-orphan')
@@ -673,6 +867,8 @@ class PurchaseOrder(db.Model):
 
     @property
     def total_subtotal(self):
+        if self.subtotal_cached is not None:
+            return self.subtotal_cached
         return sum((it.est_unit_cost or 0) * (it.quantity or 0) for it in self.items)
 
     @property
@@ -684,6 +880,8 @@ class PurchaseOrder(db.Model):
 
     @property
     def total_tax(self) -> float:
+        if self.tax_cached is not None:
+            return self.tax_cached
         try:
             return (self.total_subtotal or 0.0) * (self.effective_tax_rate or 0.0)
         except Exception:
@@ -698,6 +896,8 @@ class PurchaseOrder(db.Model):
 
     @property
     def grand_total(self) -> float:
+        if self.grand_total_cached is not None:
+            return self.grand_total_cached
         return (self.total_subtotal or 0.0) + (self.total_tax or 0.0) + (self.total_shipping or 0.0)
 
 
@@ -713,7 +913,12 @@ class OrderItem(db.Model):
     needed_by = db.Column(db.DateTime, nullable=True)
     needed_by_text = db.Column(db.String(20), nullable=True)
     ticket_id = db.Column(db.Integer, db.ForeignKey('ticket.id'), nullable=True)
-    po_id = db.Column(db.Integer, db.ForeignKey('purchase_order.id'), nullable=True)
+    # active_history so moving an item off a PO still reports the old po_id
+    # to the cached-totals flush hook
+    po_id = db.column_property(
+        db.Column(db.Integer, db.ForeignKey('purchase_order.id'), nullable=True),
+        active_history=True,
+    )
     received_at = db.Column(db.DateTime, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -721,11 +926,158 @@ class OrderItem(db.Model):
     # Convenience link to ticket
     ticket = db.relationship('Ticket', backref=db.backref('order_items', lazy='dynamic'))
 
+    __table_args__ = (
+        db.Index('ix_orderitem_po', 'po_id', 'status'),
+    )
+
     def mark_received(self):
         self.status = 'received'
         self.received_at = datetime.utcnow()
 
 
+# --- PO cached totals ---
+# Routes move items between POs by assigning po_id directly, so the in-memory
+# `items` collection can't be trusted mid-flush. Instead, collect the affected
+# PO ids during the flush and recompute from the rows the flush just wrote.
+_PO_TOTAL_ATTRS = ('subtotal_cached', 'tax_cached', 'grand_total_cached')
+
+_PO_SUBTOTAL_SQL = text(
+    """
+    UPDATE purchase_order SET subtotal_cached = (
+        SELECT COALESCE(SUM(COALESCE(oi.est_unit_cost, 0) * COALESCE(oi.quantity, 0)), 0)
+        FROM order_item oi WHERE oi.po_id = purchase_order.id
+    )
+    WHERE id IN :ids
+    """
+).bindparams(bindparam('ids', expanding=True))
+
+_PO_TAX_SQL = text(
+    """
+    UPDATE purchase_order SET tax_cached = subtotal_cached * COALESCE((
+        SELECT sl.tax_rate FROM shipping_location sl WHERE sl.id = purchase_order.shipping_location_id
+    ), 0)
+    WHERE id IN :ids
+    """
+).bindparams(bindparam('ids', expanding=True))
+
+_PO_GRAND_SQL = text(
+    """
+    UPDATE purchase_order SET grand_total_cached = subtotal_cached + tax_cached + COALESCE(shipping_cost, 0)
+    WHERE id IN :ids
+    """
+).bindparams(bindparam('ids', expanding=True))
+
+
+def refresh_po_totals(connection, po_ids) -> None:
+    """Recompute the cached totals for the given PO ids in three UPDATEs."""
+    ids = sorted(po_ids)
+    if not ids:
+        return
+    for stmt in (_PO_SUBTOTAL_SQL, _PO_TAX_SQL, _PO_GRAND_SQL):
+        connection.execute(stmt, {'ids': ids})
+
+
+def _changed(obj, attr) -> bool:
+    return sa_inspect(obj).attrs[attr].history.has_changes()
+
+
+@event.listens_for(Session, 'after_flush')
+def _refresh_po_totals(session, flush_context):
+    po_ids = set()
+    location_ids = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, OrderItem):
+            if obj in session.dirty and not any(_changed(obj, a) for a in ('po_id', 'purchase_order', 'quantity', 'est_unit_cost')):
+                continue
+            hist = sa_inspect(obj).attrs.po_id.history
+            po_ids.update(hist.added or ())
+            po_ids.update(hist.unchanged or ())
+            po_ids.update(hist.deleted or ())
+            # Moved or orphaned through the relationship (po.items.remove(item)):
+            # po_id history doesn't show the old PO
+            rel = sa_inspect(obj).attrs.purchase_order.history
+            po_ids.update(po.id for po in (*(rel.added or ()), *(rel.deleted or ())) if po is not None)
+        elif isinstance(obj, PurchaseOrder):
+            if obj in session.deleted:
+                continue
+            if obj in session.new or any(_changed(obj, a) for a in ('shipping_cost', 'shipping_location_id', 'items')):
+                po_ids.add(obj.id)
+        elif isinstance(obj, ShippingLocation):
+            if obj in session.dirty and _changed(obj, 'tax_rate'):
+                location_ids.add(obj.id)
+    po_ids.discard(None)
+    if not po_ids and not location_ids:
+        return
+    conn = session.connection()
+    if location_ids:
+        rows = conn.execute(
+            text('SELECT id FROM purchase_order WHERE shipping_location_id IN :ids')
+            .bindparams(bindparam('ids', expanding=True)),
+            {'ids': sorted(location_ids)},
+        ).fetchall()
+        po_ids.update(r[0] for r in rows)
+    refresh_po_totals(conn, po_ids)
+    session.info.setdefault('_po_totals_stale', set()).update(po_ids)
+
+
+@event.listens_for(Session, 'after_flush_postexec')
+def _expire_po_totals(session, flush_context):
+    stale = session.info.pop('_po_totals_stale', None)
+    if not stale:
+        return
+    for po_id in stale:
+        po = session.identity_map.get(session.identity_key(PurchaseOrder, po_id))
+        if po is not None:
+            session.expire(po, _PO_TOTAL_ATTRS)
+
+
+# (relationship, FK column, cached name column) on Ticket
+_ASSIGNEE_NAME_COLUMNS = (
+    ('assignee', 'assignee_id', 'assignee_name_cached'),
+    ('co_assignee', 'co_assignee_id', 'co_assignee_name_cached'),
+)
+
+
+@event.listens_for(Session, 'before_flush')
+def _stamp_assignee_names(session, flush_context, instances):
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, Ticket):
+            continue
+        for rel, fk, cached in _ASSIGNEE_NAME_COLUMNS:
+            if _changed(obj, rel):
+                user = getattr(obj, rel)
+            elif obj in session.new or _changed(obj, fk):
+                # Only the id was set; a previously loaded relationship may be stale
+                uid = getattr(obj, fk)
+                with session.no_autoflush:
+                    user = session.get(User, uid) if uid else None
+            else:
+                continue
+            setattr(obj, cached, user.name if user else None)
+
+
+@event.listens_for(User, 'after_update')
+def _sync_assignee_names(mapper, connection, target):
+    if not _changed(target, 'name'):
+        return
+    ticket = Ticket.__table__
+    for _, fk, cached in _ASSIGNEE_NAME_COLUMNS:
+        connection.execute(
+            ticket.update().where(ticket.c[fk] == target.id).values({cached: target.name})
+        )
+
+
+@event.listens_for(User, 'after_delete')
+def _clear_assignee_names(mapper, connection, target):
+    # Deleting a tech leaves assignee_id dangling; drop the cached name so
+    # lists show no assignee, like the detail page does
+    ticket = Ticket.__table__
+    for _, fk, cached in _ASSIGNEE_NAME_COLUMNS:
+        connection.execute(
+            ticket.update().where(ticket.c[fk] == target.id).values({cached: None})
+        )
+
+
 # --- PO Notes ---
 class PoNote(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -738,6 +1090,10 @@ class PoNote(db.Model):
     # Author relationship for display
     author = db.relationship('User', foreign_keys=[author_id])
 
+    __table_args__ = (
+        db.Index('ix_ponote_po_created', 'po_id', 'created_at'),
+    )
+
 
 # --- Documents ---
 class DocumentCategory(db.Model):
@@ -816,6 +1172,11 @@ class AssetLocation(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 
+# Asset statuses that checkout() promotes to 'deployed' / checkin() leaves alone
+_CHECKOUT_READY_STATUSES = frozenset({None, '', 'available', 'deployable', 'Active (deployable)'})
+_RETIRED_STATUSES = frozenset({'retired', 'archived'})
+
+
 class Asset(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     # Original ID from legacy system (CSV first column)
@@ -828,6 +1189,11 @@ class Asset(db.Model):
     category = db.Column(db.String(120), nullable=True)
     manufacturer = db.Column(db.String(120), nullable=True)
     serial_number = db.Column(db.String(255), nullable=True, index=True)
+    # Imports and FTP intake match tags/serials case-insensitively
+    __table_args__ = (
+        db.Index('ix_asset_serial_lower', func.lower(serial_number)),
+        db.Index('ix_asset_tag_lower', func.lower(asset_tag)),
+    )
     purchased_at = db.Column(db.DateTime, nullable=True)
     cost = db.Column(db.Float, nullable=True)
     warranty_months = db.Column(db.Integer, nullable=True)
@@ -840,11 +1206,14 @@ class Asset(db.Model):
     location = db.Column(db.String(255), nullable=True)
     default_location = db.Column(db.String(255), nullable=True)
     status = db.Column(db.String(50), default='available')  # available, deployed, maintenance, retired, lost, archived
-    notes = db.Column(db.Text, nullable=True)
-    specs = db.Column(db.Text, nullable=True)
-    physical_condition = db.Column(db.String(120), nullable=True)
-    end_of_life_text = db.Column(db.String(255), nullable=True)
-    url = db.Column(db.String(1000), nullable=True)
+    # Cold "details" columns: only the asset detail page and CSV export read
+    # them, so list/lookup queries leave them out of the SELECT. Those two
+    # views load the group up front with undefer_group('details').
+    notes = db.deferred(db.Column(db.Text, nullable=True), group='details')
+    specs = db.deferred(db.Column(db.Text, nullable=True), group='details')
+    physical_condition = db.deferred(db.Column(db.String(120), nullable=True), group='details')
+    end_of_life_text = db.deferred(db.Column(db.String(255), nullable=True), group='details')
+    url = db.deferred(db.Column(db.String(1000), nullable=True), group='details')
     # Assignment (checkout) to Contact
     assigned_contact_id = db.Column(db.Integer, db.ForeignKey('contact.id'), nullable=True, index=True)
     checkout_date = db.Column(db.DateTime, nullable=True)
@@ -854,8 +1223,8 @@ class Asset(db.Model):
     next_audit_date = db.Column(db.DateTime, nullable=True)
     last_spot_check = db.Column(db.DateTime, nullable=True)  # When this asset was last verified in a spot check
     deleted_flag = db.Column(db.Boolean, default=False)
-    created_at_legacy = db.Column(db.DateTime, nullable=True)
-    updated_at_legacy = db.Column(db.DateTime, nullable=True)
+    created_at_legacy = db.deferred(db.Column(db.DateTime, nullable=True), group='details')
+    updated_at_legacy = db.deferred(db.Column(db.DateTime, nullable=True), group='details')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     # Link back to originating Purchase Order / Order Item if created from a PO line
@@ -871,23 +1240,21 @@ class Asset(db.Model):
     tags = db.relationship('Tag', secondary=asset_tags, back_populates='assets')
 
     def checkout(self, contact, expected=None):
-        from datetime import datetime as _dt
         self.assigned_contact = contact
-        self.checkout_date = _dt.utcnow()
+        self.checkout_date = datetime.utcnow()
         self.expected_checkin_date = expected
         # If status currently available/deployable, mark deployed
-        if self.status in (None, '', 'available', 'deployable', 'Active (deployable)'):
+        if self.status in _CHECKOUT_READY_STATUSES:
             self.status = 'deployed'
 
     def checkin(self):
-        from datetime import datetime as _dt
-        self.last_checkin_date = _dt.utcnow()
+        self.last_checkin_date = datetime.utcnow()
         self.assigned_contact = None
         self.assigned_contact_id = None
         self.checkout_date = None
         self.expected_checkin_date = None
         # Only set to available if not retired
-        if self.status not in ('retired', 'archived'):
+        if self.status not in _RETIRED_STATUSES:
             self.status = 'available'
 
     @property
@@ -908,6 +1275,19 @@ class AssetAudit(db.Model):
     asset = db.relationship('Asset', foreign_keys=[asset_id])
     user = db.relationship('User', foreign_keys=[user_id])
 
+    @classmethod
+    def bulk_log(cls, rows):
+        """Insert many audit rows in one executemany (Core insert, no ORM objects).
+
+        rows: list of dicts with asset_id/user_id/action/field/old_value/new_value.
+        The whole batch shares one created_at stamp (it is one logical edit)
+        unless a row supplies its own. Joins the caller's transaction; the
+        caller commits.
+        """
+        if rows:
+            now = datetime.utcnow()
+            db.session.execute(db.insert(cls), [{'created_at': now, **row} for row in rows])
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -935,6 +1315,16 @@ class EmailCheck(db.Model):
         lazy='selectin'
     )
 
+    @staticmethod
+    def delete_older_than(cutoff) -> int:
+        """Delete checks (and their entries) from before `cutoff` in two bulk DELETEs.
+
+        Doesn't commit. Bulk deletes skip the ORM cascade, so the entries go first.
+        """
+        old_ids = db.select(EmailCheck.id).where(EmailCheck.checked_at < cutoff)
+        EmailCheckEntry.query.filter(EmailCheckEntry.check_id.in_(old_ids)).delete(synchronize_session=False)
+        return EmailCheck.query.filter(EmailCheck.checked_at < cutoff).delete(synchronize_session=False)
+
 
 class EmailCheckEntry(db.Model):
     __tablename__ = 'email_check_entries'
@@ -962,13 +1352,23 @@ class OutgoingEmail(db.Model):
     ticket_id = db.Column(db.Integer, db.ForeignKey('ticket.id'), nullable=True)
     # Whether the send was successful
     success = db.Column(db.Boolean, default=True)
-    # Optional error message if failed
-    error_message = db.Column(db.String(500), nullable=True)
+    # Optional error message if failed (full Graph error body / exception text)
+    error_message = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
     # Relationship to ticket
     ticket = db.relationship('Ticket', foreign_keys=[ticket_id])
 
+    # "Failed only" filter on the email log: failures are a small slice of the
+    # table, so index just those rows by date.
+    __table_args__ = (
+        db.Index(
+            'ix_outgoing_emails_failed', 'created_at',
+            sqlite_where=text('success = 0'),
+            postgresql_where=text('NOT success'),
+        ),
+    )
+
 
 class EmailOutbox(db.Model):
     """Queued outbound email drained by the scheduler (see services/mailer.py).
@@ -1115,7 +1515,9 @@ class TicketWatcher(db.Model):
     """Tracks techs watching tickets for update notifications."""
     __tablename__ = 'ticket_watchers'
     id = db.Column(db.Integer, primary_key=True)
-    ticket_id = db.Column(db.Integer, db.ForeignKey('ticket.id'), nullable=False, index=True)
+    # No separate ticket_id index: uq_ticket_watcher (ticket_id, user_id) serves
+    # both the per-ticket list and the (ticket, user) lookup.
+    ticket_id = db.Column(db.Integer, db.ForeignKey('ticket.id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
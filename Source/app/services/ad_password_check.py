@@ -4,14 +4,34 @@ This service runs daily to check Active Directory for expiring passwords
 and creates a ticket if any users have passwords expiring within the warning threshold.
 It also sends email notifications to users based on configured notification rules and templates.
 """
+from bisect import bisect_left
 from datetime import datetime, timedelta
+from operator import itemgetter
 from typing import List, Dict, Any
-from flask import current_app
+from flask import current_app, render_template
+from sqlalchemy.orm import joinedload
+import re
+import threading
+import time
 import traceback
 import sys
 
 from .. import db
-from ..models import Setting, Ticket, Contact, PasswordExpiryNotification
+from ..models import Setting, Ticket, Contact, EmailTemplate, PasswordExpiryNotification
+
+
+# Every setting the job reads, fetched in one query per run
+_AD_SETTING_KEYS = (
+    'AD_PWD_CHECK_ENABLED', 'AD_ENABLED', 'AD_SERVER', 'AD_PORT', 'AD_USE_SSL',
+    'AD_START_TLS', 'AD_BASE_DN', 'AD_BIND_DN', 'AD_BIND_PASSWORD', 'AD_PWD_WARNING_DAYS',
+)
+_TRUTHY = frozenset(('1', 'true', 'on', 'yes'))
+
+
+def _setting(settings: Dict[str, Any], key: str, default=None):
+    """Setting.get() semantics over a Setting.get_many() result."""
+    value = settings.get(key)
+    return value if value else default
 
 
 def run_ad_password_check(app=None) -> None:
@@ -53,38 +73,48 @@ def run_ad_password_check(app=None) -> None:
         else:
             print('AD Password Check: Job started (no logger available)', file=sys.stderr)
         
+        settings = Setting.get_many(_AD_SETTING_KEYS)
+        
         # Check if daily password check is enabled
-        pwd_check_enabled = (Setting.get('AD_PWD_CHECK_ENABLED', '0') or '0') in ('1', 'true', 'on', 'yes')
+        pwd_check_enabled = _setting(settings, 'AD_PWD_CHECK_ENABLED', '0') in _TRUTHY
         if not pwd_check_enabled:
             if logger:
                 logger.info('AD Password Check: Skipped - feature is disabled in settings')
             return
         
         # Check if AD is configured
-        ad_enabled = (Setting.get('AD_ENABLED', '0') or '0') in ('1', 'true', 'on', 'yes')
+        ad_enabled = _setting(settings, 'AD_ENABLED', '0') in _TRUTHY
         if not ad_enabled:
             if logger:
                 logger.warning('AD Password Check: AD is not enabled')
             return
         
-        ad_server = Setting.get('AD_SERVER', '')
+        ad_server = _setting(settings, 'AD_SERVER', '')
         if not ad_server:
             if logger:
                 logger.warning('AD Password Check: AD server not configured')
             return
+        warning_days = int(_setting(settings, 'AD_PWD_WARNING_DAYS', '14'))
         
         # Run the password check
         if logger:
             logger.info('AD Password Check: Querying Active Directory...')
-        expiring_users = _check_ad_passwords(logger)
+        expiring_users = _check_ad_passwords(logger, settings, warning_days)
         
-        if expiring_users:
-            # Send individual email notifications based on notification rules
-            _send_password_expiry_notifications(expiring_users, logger)
-            # Create summary ticket for helpdesk
-            _create_expiring_passwords_ticket(expiring_users, logger)
-        elif logger:
-            logger.info('AD Password Check: No expiring passwords found within warning threshold')
+        # The contact refresh, queued notifications with their tracking, and
+        # the summary ticket are committed as one transaction
+        try:
+            if expiring_users:
+                # Send individual email notifications based on notification
+                # rules and create the summary ticket
+                _send_password_expiry_notifications(expiring_users, logger)
+                _create_expiring_passwords_ticket(expiring_users, logger, warning_days)
+            elif logger:
+                logger.info('AD Password Check: No expiring passwords found within warning threshold')
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
         
         if logger:
             logger.info('AD Password Check: Job completed successfully')
@@ -104,28 +134,19 @@ def run_ad_password_check(app=None) -> None:
                 pass
 
 
-def _check_ad_passwords(logger) -> List[Dict[str, Any]]:
+def _check_ad_passwords(logger, settings: Dict[str, Any], warning_days: int) -> List[Dict[str, Any]]:
     """Query AD for password expiry dates and return list of expiring users."""
     try:
-        from ldap3 import Server, Connection, ALL, SUBTREE, Tls
-        from ldap3.utils.conv import escape_filter_chars
-        import ssl
+        from ldap3 import SUBTREE
     except ImportError:
         if logger:
             logger.error('AD Password Check: ldap3 package not installed')
         return []
     
-    from sqlalchemy import or_
+    from sqlalchemy import or_, update as sa_update
     
-    # Get AD settings
-    ad_server = Setting.get('AD_SERVER', '')
-    ad_port = int(Setting.get('AD_PORT', '389') or '389')
-    ad_use_ssl = (Setting.get('AD_USE_SSL', '0') or '0') in ('1', 'true', 'on', 'yes')
-    ad_start_tls = (Setting.get('AD_START_TLS', '0') or '0') in ('1', 'true', 'on', 'yes')
-    ad_base_dn = Setting.get('AD_BASE_DN', '')
-    ad_bind_dn = Setting.get('AD_BIND_DN', '')
-    ad_bind_password = Setting.get('AD_BIND_PASSWORD', '')
-    warning_days = int(Setting.get('AD_PWD_WARNING_DAYS', '14') or '14')
+    # Connection settings are applied by _get_ad_conn
+    ad_base_dn = _setting(settings, 'AD_BASE_DN', '')
     
     if not ad_base_dn:
         if logger:
@@ -135,134 +156,97 @@ def _check_ad_passwords(logger) -> List[Dict[str, Any]]:
     expiring_users = []
     
     try:
-        # Configure TLS if needed
-        tls_config = None
-        if ad_use_ssl or ad_start_tls:
-            tls_config = Tls(validate=ssl.CERT_NONE)
-        
-        # Create server and connection
-        server = Server(
-            ad_server,
-            port=ad_port,
-            use_ssl=ad_use_ssl,
-            tls=tls_config,
-            get_info=ALL,
-            connect_timeout=10
-        )
-        
-        conn = Connection(
-            server,
-            user=ad_bind_dn,
-            password=ad_bind_password,
-            auto_bind=False,
-            raise_exceptions=True
-        )
-        
-        if ad_start_tls and not ad_use_ssl:
-            conn.open()
-            conn.start_tls()
-        
-        if not conn.bind():
+        # Get all contacts with email addresses (non-archived)
+        # Plain rows, not ORM objects: results are written back in one bulk
+        # UPDATE below rather than a dirty-object flush per contact
+        contacts = db.session.execute(
+            db.select(Contact.id, Contact.name, Contact.email, Contact.last_notification_days_before).where(
+                Contact.email.isnot(None),
+                Contact.email != '',
+                or_(Contact.archived == False, Contact.archived.is_(None))
+            )
+        ).all()
+        if not contacts:
+            # Nothing to match (e.g. fresh install): don't bind or search AD
             if logger:
-                logger.error(f'AD Password Check: Failed to bind - {conn.result}')
+                logger.info('AD Password Check: No active contacts with email addresses')
             return []
+        contact_updates = []
         
-        # Get all contacts with email addresses (non-archived)
-        contacts = Contact.query.filter(
-            Contact.email.isnot(None),
-            Contact.email != '',
-            or_(Contact.archived == False, Contact.archived.is_(None))
-        ).all()
+        now = datetime.utcnow()
         
-        # Get domain max password age from AD (default to 90 days if not found)
-        max_pwd_age_days = 90
-        try:
-            conn.search(
-                search_base=ad_base_dn,
-                search_filter='(objectClass=domain)',
-                search_scope=SUBTREE,
-                attributes=['maxPwdAge']
+        # Domain max password age, then one paged search for every AD user
+        # with an address instead of a search per contact
+        def read_directory(conn):
+            return (
+                _max_pwd_age_days(conn, ad_base_dn, SUBTREE),
+                _index_ad_users_by_email(conn, ad_base_dn, SUBTREE),
             )
-            if conn.entries:
-                max_pwd_age = conn.entries[0].maxPwdAge.value
-                if max_pwd_age:
-                    max_pwd_age_days = abs(int(max_pwd_age)) / (10000000 * 60 * 60 * 24)
-        except Exception:
-            pass
-        
-        now = datetime.utcnow()
+        max_pwd_age_days, ad_users = _with_ad_conn(settings, read_directory)
+        max_pwd_age = timedelta(days=max_pwd_age_days)
         
         for contact in contacts:
             email = contact.email.strip().lower()
-            escaped_email = escape_filter_chars(email)
-            
-            # Search for user by email
-            search_filter = f'(|(mail={escaped_email})(userPrincipalName={escaped_email})(proxyAddresses=smtp:{escaped_email})(proxyAddresses=SMTP:{escaped_email}))'
-            
-            conn.search(
-                search_base=ad_base_dn,
-                search_filter=search_filter,
-                search_scope=SUBTREE,
-                attributes=['sAMAccountName', 'pwdLastSet', 'userAccountControl', 'cn']
-            )
+            ad_user = ad_users.get(email)
             
             days_until_expiry = None
+            pwd_set_date = None
             expiry_date = None
             never_expires = False
             found_in_ad = False
             ad_username = None
             ad_disabled = False
             
-            if conn.entries:
-                entry = conn.entries[0]
+            if ad_user is not None:
                 found_in_ad = True
-                ad_username = str(entry.sAMAccountName) if hasattr(entry, 'sAMAccountName') and entry.sAMAccountName else None
+                ad_username = _attr(ad_user, 'sAMAccountName')
+                ad_username = str(ad_username) if ad_username else None
                 
                 # Check userAccountControl flags
-                uac = int(entry.userAccountControl.value) if hasattr(entry, 'userAccountControl') and entry.userAccountControl.value else 0
+                uac = int(_attr(ad_user, 'userAccountControl') or 0)
                 # Check if account is disabled (UAC flag 0x2)
                 ad_disabled = bool(uac & 0x2)
                 # Check if password never expires (UAC flag 0x10000)
                 if uac & 0x10000:
                     never_expires = True
                 else:
-                    pwd_last_set = entry.pwdLastSet.value if hasattr(entry, 'pwdLastSet') and entry.pwdLastSet.value else None
+                    pwd_last_set = _attr(ad_user, 'pwdLastSet') or None
                     
                     if pwd_last_set:
-                        if isinstance(pwd_last_set, datetime):
-                            pwd_set_date = pwd_last_set
-                        else:
-                            try:
-                                pwd_set_date = datetime(1601, 1, 1) + timedelta(microseconds=int(pwd_last_set) / 10)
-                            except Exception:
-                                pwd_set_date = None
-                        
+                        pwd_set_date = _filetime_to_dt(pwd_last_set)
                         if pwd_set_date:
-                            expiry_date = pwd_set_date + timedelta(days=max_pwd_age_days)
-                            if expiry_date.tzinfo is not None:
-                                expiry_date = expiry_date.replace(tzinfo=None)
+                            if pwd_set_date.tzinfo is not None:
+                                pwd_set_date = pwd_set_date.replace(tzinfo=None)
+                            expiry_date = pwd_set_date + max_pwd_age
                             days_until_expiry = (expiry_date - now).days
             
-            # Update Contact record
-            contact.ad_disabled = ad_disabled if found_in_ad else None
+            # Queue the Contact update
+            update = {
+                'id': contact.id,
+                'ad_disabled': ad_disabled if found_in_ad else None,
+                'password_checked_at': now,
+                'password_last_set_at': pwd_set_date,
+                'password_expires_at': expiry_date,
+            }
             if not found_in_ad:
-                contact.password_expires_days = -999
+                update['password_expires_days'] = -999
             elif never_expires:
-                contact.password_expires_days = -1
+                update['password_expires_days'] = -1
             elif days_until_expiry is not None:
-                contact.password_expires_days = days_until_expiry
+                update['password_expires_days'] = days_until_expiry
                 # If password was reset (days_until > warning threshold), clear notification tracking
                 # so they can receive new notifications when their password is about to expire again
                 if days_until_expiry > warning_days and contact.last_notification_days_before is not None:
-                    contact.last_notification_days_before = None
-                    contact.password_notification_sent_at = None
+                    update['last_notification_days_before'] = None
+                    update['password_notification_sent_at'] = None
             else:
-                contact.password_expires_days = None
-            contact.password_checked_at = now
+                update['password_expires_days'] = None
+            contact_updates.append(update)
             
-            # Check if this user should be in the warning list (skip disabled accounts)
+            # Check if this user should be in the warning list (skip disabled accounts);
+            # already-expired passwords (negative days) are included
             if found_in_ad and not never_expires and not ad_disabled and days_until_expiry is not None:
-                if 0 <= days_until_expiry <= warning_days:
+                if days_until_expiry <= warning_days:
                     expiring_users.append({
                         'contact_id': contact.id,
                         'name': contact.name,
@@ -271,27 +255,21 @@ def _check_ad_passwords(logger) -> List[Dict[str, Any]]:
                         'days_until_expiry': days_until_expiry,
                         'expiry_date': expiry_date.strftime('%Y-%m-%d') if expiry_date else None,
                         'is_expired': days_until_expiry < 0,
-                        'ad_disabled': ad_disabled
-                    })
-                elif days_until_expiry < 0:
-                    # Already expired
-                    expiring_users.append({
-                        'contact_id': contact.id,
-                        'name': contact.name,
-                        'email': email,
-                        'ad_username': ad_username,
-                        'days_until_expiry': days_until_expiry,
-                        'expiry_date': expiry_date.strftime('%Y-%m-%d') if expiry_date else None,
-                        'is_expired': True,
-                        'ad_disabled': ad_disabled
+                        'ad_disabled': ad_disabled,
+                        # Tier already notified; read by the notification pass
+                        'last_notification_days_before': contact.last_notification_days_before,
                     })
         
-        # Commit Contact updates
-        db.session.commit()
-        conn.unbind()
+        # Write all Contact updates as executemany UPDATEs keyed by id. Rows
+        # are batched per run of identical keys, so group the notification
+        # resets (two extra keys) together.
+        if contact_updates:
+            contact_updates.sort(key=len)
+            db.session.execute(sa_update(Contact), contact_updates)
         
+
         # Sort: expired first (most negative), then by days until expiry ascending
-        expiring_users.sort(key=lambda u: u['days_until_expiry'])
+        expiring_users.sort(key=itemgetter('days_until_expiry'))
         
         if logger:
             logger.info(f'AD Password Check: Found {len(expiring_users)} users with expiring/expired passwords')
@@ -299,24 +277,243 @@ def _check_ad_passwords(logger) -> List[Dict[str, Any]]:
         return expiring_users
         
     except Exception as e:
+        db.session.rollback()
         if logger:
             logger.exception(f'AD Password Check error: {e}')
         return []
 
 
+_AD_USER_FILTER = '(&(objectCategory=person)(objectClass=user)(|(mail=*)(userPrincipalName=*)(proxyAddresses=*)))'
+_AD_USER_ATTRIBUTES = ['sAMAccountName', 'pwdLastSet', 'userAccountControl', 'mail', 'userPrincipalName', 'proxyAddresses']
+# Per-address OR clause for targeted lookups, and addresses per search
+_AD_EMAIL_CLAUSE = '(mail={e})(userPrincipalName={e})(proxyAddresses=smtp:{e})(proxyAddresses=SMTP:{e})'
+_AD_EMAIL_CHUNK = 500
+
+
+_EPOCH_1601 = datetime(1601, 1, 1)
+
+
+def _filetime_to_dt(value):
+    """pwdLastSet as a datetime. ldap3 normally decodes it already; a raw value
+    is a Windows FILETIME (100ns ticks since 1601), kept to whole seconds.
+    None if it can't be parsed."""
+    if isinstance(value, datetime):
+        return value
+    try:
+        return _EPOCH_1601 + timedelta(seconds=int(value) // 10_000_000)
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def _attr(attributes: Dict[str, Any], name: str):
+    """Single value of an ldap3 attribute dict entry (absent/empty -> None)."""
+    value = attributes.get(name)
+    if isinstance(value, (list, tuple)):
+        return value[0] if value else None
+    return value
+
+
+# One bound connection per app, shared by the scheduled job and the admin
+# check. ldap3's sync strategies are not thread-safe, so use is serialised.
+_AD_CONN_LOCK = threading.Lock()
+_AD_CONN_SETTING_KEYS = ('AD_SERVER', 'AD_PORT', 'AD_USE_SSL', 'AD_START_TLS', 'AD_BIND_DN', 'AD_BIND_PASSWORD')
+
+
+def _ad_server(hosts: str, port: int, use_ssl: bool, tls, get_info=None):
+    """ldap3 Server for AD_SERVER, or a FIRST-strategy ServerPool when it lists
+    several domain controllers (comma/space separated) for failover.
+
+    No schema/DSA info is read on connect unless get_info asks for it: the
+    password check only needs raw attribute values.
+    """
+    from ldap3 import Server, ServerPool, FIRST, NONE
+    
+    servers = [
+        Server(host, port=port, use_ssl=use_ssl, tls=tls, get_info=get_info or NONE, connect_timeout=10)
+        for host in re.split(r'[\s,;]+', hosts.strip()) if host
+    ]
+    if len(servers) == 1:
+        return servers[0]
+    # active=1: try each DC once per open; exhaust: skip a dead DC for 5 minutes
+    return ServerPool(servers, FIRST, active=1, exhaust=300)
+
+
+def _get_ad_conn(app, settings: Dict[str, Any]):
+    """Bound RESTARTABLE connection cached on app.extensions['ad_conn'].
+
+    Rebuilt when the connection settings change and re-bound if the session
+    was lost, so TLS + bind happen once rather than every run. Caller holds
+    _AD_CONN_LOCK.
+    """
+    from ldap3 import Connection, RESTARTABLE, Tls
+    from ldap3.core.exceptions import LDAPBindError
+    import ssl
+    
+    key = tuple(_setting(settings, k, '') for k in _AD_CONN_SETTING_KEYS)
+    cached = app.extensions.get('ad_conn')
+    if cached is not None:
+        if cached[0] == key and cached[1].bound and not cached[1].closed:
+            return cached[1]
+        _drop_ad_conn(app)
+    
+    ad_use_ssl = _setting(settings, 'AD_USE_SSL', '0') in _TRUTHY
+    ad_start_tls = _setting(settings, 'AD_START_TLS', '0') in _TRUTHY
+    tls_config = None
+    if ad_use_ssl or ad_start_tls:
+        tls_config = Tls(validate=ssl.CERT_NONE)
+    server = _ad_server(
+        _setting(settings, 'AD_SERVER', ''),
+        int(_setting(settings, 'AD_PORT', '389')),
+        ad_use_ssl,
+        tls_config,
+    )
+    conn = Connection(
+        server,
+        user=_setting(settings, 'AD_BIND_DN', ''),
+        password=_setting(settings, 'AD_BIND_PASSWORD', ''),
+        auto_bind=False,
+        client_strategy=RESTARTABLE,
+        raise_exceptions=True
+    )
+    # RESTARTABLE retries forever by default; don't wedge the scheduler on a dead
+    # DC. Each restart moves on to the next DC when AD_SERVER lists several.
+    conn.strategy.restartable_tries = 3
+    
+    if ad_start_tls and not ad_use_ssl:
+        conn.open()
+        conn.start_tls()
+    if not conn.bind():
+        raise LDAPBindError(f'Failed to bind - {conn.result}')
+    app.extensions['ad_conn'] = (key, conn)
+    return conn
+
+
+def _drop_ad_conn(app) -> None:
+    cached = app.extensions.pop('ad_conn', None)
+    if cached is not None:
+        try:
+            cached[1].unbind()
+        except Exception:
+            pass
+
+
+def _with_ad_conn(settings: Dict[str, Any], fn):
+    """Run fn(conn) on the shared AD connection, re-binding once if the server ended the session."""
+    from ldap3.core.exceptions import LDAPSessionTerminatedByServerError
+    
+    app = current_app._get_current_object()
+    with _AD_CONN_LOCK:
+        try:
+            return fn(_get_ad_conn(app, settings))
+        except LDAPSessionTerminatedByServerError:
+            _drop_ad_conn(app)
+            return fn(_get_ad_conn(app, settings))
+
+
+# (server host, port, base DN) -> (max_pwd_age_days, monotonic time read).
+# Domain password policy changes on the order of months.
+_MAX_PWD_AGE_TTL = 24 * 60 * 60
+_max_pwd_age_cache: Dict[tuple, tuple] = {}
+
+
+def _max_pwd_age_days(conn, base_dn: str, scope, refresh: bool = False) -> float:
+    """Domain maxPwdAge in days (90 if it can't be read).
+
+    Successful reads are cached for _MAX_PWD_AGE_TTL; refresh=True re-reads.
+    Caller holds _AD_CONN_LOCK (via _with_ad_conn), which also guards the cache.
+    """
+    key = (conn.server.host, conn.server.port, base_dn)
+    cached = _max_pwd_age_cache.get(key)
+    if cached is not None and not refresh and time.monotonic() - cached[1] < _MAX_PWD_AGE_TTL:
+        return cached[0]
+    try:
+        conn.search(
+            search_base=base_dn,
+            search_filter='(objectClass=domain)',
+            search_scope=scope,
+            attributes=['maxPwdAge']
+        )
+        if conn.entries:
+            max_pwd_age = conn.entries[0].maxPwdAge.value
+            if max_pwd_age:
+                if isinstance(max_pwd_age, timedelta):
+                    # Decoded by ldap3 when the server schema was loaded
+                    days = abs(max_pwd_age.total_seconds()) / (60 * 60 * 24)
+                else:
+                    # Raw: 100-nanosecond intervals (negative value)
+                    days = abs(int(max_pwd_age)) / (10000000 * 60 * 60 * 24)
+                _max_pwd_age_cache[key] = (days, time.monotonic())
+                return days
+    except Exception:
+        pass
+    return 90
+
+
+def _index_ad_users_by_email(conn, base_dn: str, scope, emails=None) -> Dict[str, Dict[str, Any]]:
+    """Map lowercased mail / userPrincipalName / smtp proxy address -> AD user attributes.
+
+    With emails=None, pages through every user object in one search. With a
+    list of addresses, searches only for those, _AD_EMAIL_CHUNK per OR filter
+    (cheaper when there are far fewer contacts than directory users). Either
+    way the caller matches contacts in memory; the first user seen keeps an
+    address.
+    """
+    if emails is None:
+        filters = [_AD_USER_FILTER]
+    else:
+        from ldap3.utils.conv import escape_filter_chars
+        emails = sorted({e.strip().lower() for e in emails if e and e.strip()})
+        filters = [
+            '(|' + ''.join(_AD_EMAIL_CLAUSE.format(e=escape_filter_chars(e)) for e in emails[i:i + _AD_EMAIL_CHUNK]) + ')'
+            for i in range(0, len(emails), _AD_EMAIL_CHUNK)
+        ]
+    by_email: Dict[str, Dict[str, Any]] = {}
+    for search_filter in filters:
+        results = conn.extend.standard.paged_search(
+            search_base=base_dn,
+            search_filter=search_filter,
+            search_scope=scope,
+            attributes=_AD_USER_ATTRIBUTES,
+            paged_size=1000,
+            generator=True,
+        )
+        for result in results:
+            if result.get('type') != 'searchResEntry':
+                continue
+            attributes = result.get('attributes') or {}
+            addresses = [_attr(attributes, 'mail'), _attr(attributes, 'userPrincipalName')]
+            proxies = attributes.get('proxyAddresses') or []
+            if isinstance(proxies, str):
+                proxies = [proxies]
+            for proxy in proxies:
+                if proxy.lower().startswith('smtp:'):
+                    addresses.append(proxy[5:])
+            for address in addresses:
+                if address:
+                    by_email.setdefault(str(address).strip().lower(), attributes)
+    return by_email
+
+
 def _send_password_expiry_notifications(expiring_users: List[Dict[str, Any]], logger) -> None:
-    """Send email notifications to users based on configured notification rules and templates.
+    """Queue email notifications to users based on configured notification rules and templates.
+    
+    Emails go to the EmailOutbox (delivered by the scheduler's drain job, with
+    retries) in the caller's transaction, so a queued email and the contact's
+    notification tracking are committed together.
     
     For each user with an expiring password, checks the notification rules to see if
     an email should be sent. Only sends if:
     1. There's an enabled notification rule matching the user's days_until_expiry
     2. The user hasn't already received a notification for this tier (days_before)
     """
-    from .ms_graph import send_mail
+    from .mailer import enqueue_mail
     
     # Get all enabled notification rules, sorted by days_before descending
     # (so we check higher thresholds first, e.g., 10 days before 5 days)
-    notification_rules = PasswordExpiryNotification.query.filter(
+    # Each rule's template is read per user below, so load them in the same query
+    notification_rules = PasswordExpiryNotification.query.options(
+        joinedload(PasswordExpiryNotification.template)
+    ).filter(
         PasswordExpiryNotification.enabled == True
     ).order_by(PasswordExpiryNotification.days_before.desc()).all()
     
@@ -325,49 +522,47 @@ def _send_password_expiry_notifications(expiring_users: List[Dict[str, Any]], lo
             logger.info('AD Password Check: No notification rules configured, skipping email notifications')
         return
     
-    # Get days_before values for quick lookup
+    # Get days_before values for quick lookup; ascending copy for bisect
     rule_days = [rule.days_before for rule in notification_rules]
+    rule_days_asc = sorted(rule_days)
+    rule_by_days = {rule.days_before: rule for rule in notification_rules}
     
     if logger:
         logger.info(f'AD Password Check: Found {len(notification_rules)} notification rules: {rule_days}')
     
-    emails_sent = 0
+    emails_queued = 0
     emails_skipped = 0
     now = datetime.utcnow()
+    # Tracking for queued emails, written back in one bulk UPDATE below
+    notify_updates = []
     
     for user in expiring_users:
-        contact_id = user.get('contact_id')
-        if not contact_id:
-            continue
-        
-        contact = Contact.query.get(contact_id)
-        if not contact or not contact.email:
+        # Everything needed from the contact was captured by the AD pass
+        email = user.get('email')
+        if not user.get('contact_id') or not email:
             continue
         
         days_until = user['days_until_expiry']
         
-        # Find the applicable notification rule for this user
-        # The rule that applies is the lowest days_before that is >= days_until_expiry
-        # E.g., if user has 3 days left and rules are [7, 5, 3, 1], the 3-day rule applies
-        # We iterate from highest to lowest and keep updating until we find the closest match
-        applicable_rule = None
-        for rule in notification_rules:
-            if days_until <= rule.days_before:
-                applicable_rule = rule
-                # Continue to find a more specific (lower threshold) rule
+        # Find the applicable notification rule for this user: the lowest
+        # days_before that is >= days_until_expiry. E.g., if user has 3 days
+        # left and rules are [7, 5, 3, 1], the 3-day rule applies
+        idx = bisect_left(rule_days_asc, days_until)
+        applicable_rule = rule_by_days[rule_days_asc[idx]] if idx < len(rule_days_asc) else None
         
         if not applicable_rule:
             # User's days_until_expiry is greater than all notification thresholds
             if logger:
-                logger.debug(f'AD Password Check: {contact.email} has {days_until} days, no rule applies')
+                logger.debug(f'AD Password Check: {email} has {days_until} days, no rule applies')
             continue
         
         # Check if we've already sent a notification for this tier
-        if contact.last_notification_days_before is not None:
-            if contact.last_notification_days_before <= applicable_rule.days_before:
+        last_tier = user.get('last_notification_days_before')
+        if last_tier is not None:
+            if last_tier <= applicable_rule.days_before:
                 # Already sent this tier or a lower (more urgent) one
                 if logger:
-                    logger.debug(f'AD Password Check: {contact.email} already notified at {contact.last_notification_days_before}-day tier')
+                    logger.debug(f'AD Password Check: {email} already notified at {last_tier}-day tier')
                 emails_skipped += 1
                 continue
         
@@ -378,47 +573,62 @@ def _send_password_expiry_notifications(expiring_users: List[Dict[str, Any]], lo
                 logger.warning(f'AD Password Check: Rule {applicable_rule.days_before}-day has no template')
             continue
         
-        # Build the email with template placeholders replaced
-        subject = _replace_template_placeholders(template.subject, user, contact)
-        body = _replace_template_placeholders(template.body, user, contact)
+        # Build the email with template placeholders replaced (newlines in
+        # the template body already converted to <br>)
+        _, subject_parts, body_parts = _compiled_template(template)
+        subject = _fill_template_parts(subject_parts, user)
+        body = _fill_template_parts(body_parts, user)
         
-        # Convert newlines to HTML line breaks for proper email formatting
-        # This preserves the formatting from the email template
-        body = body.replace('\r\n', '<br>').replace('\n', '<br>').replace('\r', '<br>')
-        
-        # Send the email
-        try:
-            success = send_mail(
-                to_address=contact.email,
-                subject=subject,
-                html_body=body,
-                to_name=contact.name,
-                category='password_expiry'
-            )
-            
-            if success:
-                # Update contact to record the notification was sent
-                contact.password_notification_sent_at = now
-                contact.last_notification_days_before = applicable_rule.days_before
-                emails_sent += 1
-                if logger:
-                    logger.info(f'AD Password Check: Sent {applicable_rule.days_before}-day notification to {contact.email}')
-            else:
-                if logger:
-                    logger.warning(f'AD Password Check: Failed to send email to {contact.email}')
-        except Exception as e:
-            if logger:
-                logger.exception(f'AD Password Check: Error sending email to {contact.email}: {e}')
+        # Queue the email and record the notification tier
+        enqueue_mail(
+            to_address=email,
+            subject=subject,
+            html_body=body,
+            to_name=user.get('name'),
+            category='password_expiry',
+            commit=False
+        )
+        notify_updates.append({
+            'id': user['contact_id'],
+            'password_notification_sent_at': now,
+            'last_notification_days_before': applicable_rule.days_before,
+        })
+        emails_queued += 1
+        if logger:
+            logger.info(f'AD Password Check: Queued {applicable_rule.days_before}-day notification to {email}')
     
-    # Commit all contact updates
-    db.session.commit()
+    # Outbox rows and contact updates are committed by the caller with the
+    # summary ticket
+    if notify_updates:
+        from sqlalchemy import update as sa_update
+        db.session.execute(sa_update(Contact), notify_updates)
     
     if logger:
-        logger.info(f'AD Password Check: Sent {emails_sent} notification emails, skipped {emails_skipped} (already notified)')
+        logger.info(f'AD Password Check: Queued {emails_queued} notification emails, skipped {emails_skipped} (already notified)')
+
+
+# Template placeholders; re.split() on this yields [text, name, text, name, ..., text]
+_PLACEHOLDER_RE = re.compile(r'\{\{(name|user_name|email|user_email|days|days_until_expiry|expiry_date|ad_username)\}\}')
+# template id -> (updated_at, subject parts, body parts)
+_template_cache: Dict[int, tuple] = {}
+
+
+def _compiled_template(template: EmailTemplate) -> tuple:
+    """Subject/body of a template pre-split around its placeholders.
+
+    Cached per process and rebuilt when the template's updated_at changes, so
+    each notification only joins strings. Body newlines become <br> here.
+    """
+    cached = _template_cache.get(template.id)
+    if cached is None or cached[0] != template.updated_at:
+        body = template.body.replace('\r\n', '<br>').replace('\n', '<br>').replace('\r', '<br>')
+        cached = (template.updated_at, _PLACEHOLDER_RE.split(template.subject), _PLACEHOLDER_RE.split(body))
+        _template_cache[template.id] = cached
+    return cached
 
 
-def _replace_template_placeholders(text: str, user: Dict[str, Any], contact: Contact) -> str:
-    """Replace template placeholders with actual values.
+def _fill_template_parts(parts: List[str], user: Dict[str, Any]) -> str:
+    """Fill placeholders in _compiled_template() parts with actual values.
     
     Available placeholders:
     - {{name}} or {{user_name}} - Contact's name
@@ -427,70 +637,31 @@ def _replace_template_placeholders(text: str, user: Dict[str, Any], contact: Con
     - {{expiry_date}} - Password expiry date
     - {{ad_username}} - AD username (sAMAccountName)
     """
-    replacements = {
-        '{{name}}': contact.name or '',
-        '{{user_name}}': contact.name or '',
-        '{{email}}': contact.email or '',
-        '{{user_email}}': contact.email or '',
-        '{{days}}': str(user.get('days_until_expiry', '')),
-        '{{days_until_expiry}}': str(user.get('days_until_expiry', '')),
-        '{{expiry_date}}': user.get('expiry_date', ''),
-        '{{ad_username}}': user.get('ad_username', ''),
+    values = {
+        'name': user.get('name') or '',
+        'user_name': user.get('name') or '',
+        'email': user.get('email') or '',
+        'user_email': user.get('email') or '',
+        'days': str(user.get('days_until_expiry', '')),
+        'days_until_expiry': str(user.get('days_until_expiry', '')),
+        'expiry_date': user.get('expiry_date', '') or '',
+        'ad_username': user.get('ad_username', '') or '',
     }
-    
-    result = text
-    for placeholder, value in replacements.items():
-        result = result.replace(placeholder, value or '')
-    
-    return result
+    filled = parts[:]
+    for i in range(1, len(filled), 2):
+        filled[i] = values[filled[i]]
+    return ''.join(filled)
 
 
-def _create_expiring_passwords_ticket(expiring_users: List[Dict[str, Any]], logger) -> None:
+def _create_expiring_passwords_ticket(expiring_users: List[Dict[str, Any]], logger, warning_days: int) -> None:
     """Create a ticket listing users with expiring passwords."""
-    warning_days = int(Setting.get('AD_PWD_WARNING_DAYS', '14') or '14')
-    
-    # Build the ticket body
-    body_lines = [
-        f"<p>The following users have passwords expiring within <strong>{warning_days} days</strong>:</p>",
-        "<table style='border-collapse: collapse; width: 100%;'>",
-        "<thead>",
-        "<tr style='background-color: #f2f2f2;'>",
-        "<th style='border: 1px solid #ddd; padding: 8px; text-align: left;'>Name</th>",
-        "<th style='border: 1px solid #ddd; padding: 8px; text-align: left;'>Email</th>",
-        "<th style='border: 1px solid #ddd; padding: 8px; text-align: left;'>AD Username</th>",
-        "<th style='border: 1px solid #ddd; padding: 8px; text-align: left;'>Expires</th>",
-        "<th style='border: 1px solid #ddd; padding: 8px; text-align: left;'>Status</th>",
-        "</tr>",
-        "</thead>",
-        "<tbody>",
-    ]
-    
-    for user in expiring_users:
-        if user['is_expired']:
-            status = '<span style="color: red; font-weight: bold;">EXPIRED</span>'
-            row_style = 'background-color: #ffebee;'
-        elif user['days_until_expiry'] <= 3:
-            status = f'<span style="color: red;">{user["days_until_expiry"]} day{"s" if user["days_until_expiry"] != 1 else ""}</span>'
-            row_style = 'background-color: #fff3e0;'
-        else:
-            status = f'{user["days_until_expiry"]} days'
-            row_style = ''
-        
-        body_lines.append(f"<tr style='{row_style}'>")
-        body_lines.append(f"<td style='border: 1px solid #ddd; padding: 8px;'>{user['name'] or '—'}</td>")
-        body_lines.append(f"<td style='border: 1px solid #ddd; padding: 8px;'>{user['email']}</td>")
-        body_lines.append(f"<td style='border: 1px solid #ddd; padding: 8px;'>{user['ad_username'] or '—'}</td>")
-        body_lines.append(f"<td style='border: 1px solid #ddd; padding: 8px;'>{user['expiry_date'] or '—'}</td>")
-        body_lines.append(f"<td style='border: 1px solid #ddd; padding: 8px;'>{status}</td>")
-        body_lines.append("</tr>")
-    
-    body_lines.extend([
-        "</tbody>",
-        "</table>",
-        f"<p style='margin-top: 16px; color: #666; font-size: 0.9em;'>This ticket was automatically generated on {datetime.utcnow().strftime('%Y-%m-%d at %H:%M UTC')}.</p>"
-    ])
-    
-    body_html = "\n".join(body_lines)
+    # Build the ticket body (autoescaped; compiled once per process)
+    body_html = render_template(
+        'tickets/_password_expiry_body.html',
+        users=expiring_users,
+        warning_days=warning_days,
+        now=datetime.utcnow(),
+    )
     
     # Count expired vs expiring
     expired_count = sum(1 for u in expiring_users if u['is_expired'])
@@ -505,8 +676,10 @@ def _create_expiring_passwords_ticket(expiring_users: List[Dict[str, Any]], logg
     
     subject = f"Passwords Expiring - {', '.join(subject_parts)}"
     
-    # Create the ticket
-    ticket = Ticket(
+    # Create the ticket with a Core INSERT (no assignee, so none of the ORM
+    # flush hooks apply); the caller commits
+    now = datetime.utcnow()
+    result = db.session.execute(db.insert(Ticket).values(
         subject=subject,
         body=body_html,
         status='new',
@@ -514,15 +687,13 @@ def _create_expiring_passwords_ticket(expiring_users: List[Dict[str, Any]], logg
         source='system',
         requester_name='System',
         requester_email='system@helpdesk.local',
-        created_at=datetime.utcnow(),
-        updated_at=datetime.utcnow()
-    )
-    
-    db.session.add(ticket)
-    db.session.commit()
+        created_at=now,
+        updated_at=now
+    ))
+    ticket_id = result.inserted_primary_key[0]
     
     # Note: Individual user email notifications and contact tracking are now handled 
     # in _send_password_expiry_notifications() which runs before this function
     
     if logger:
-        logger.info(f'AD Password Check: Created ticket #{ticket.id} for {len(expiring_users)} users with expiring passwords')
+        logger.info(f'AD Password Check: Created ticket #{ticket_id} for {len(expiring_users)} users with expiring passwords')
@@ -10,7 +10,6 @@ dismissed set from the UI. Rows are claimed with an atomic UPDATE so the
 scheduler job and a web-kicked thread never generate the same row twice.
 """
 import hashlib
-import html as _html
 import json
 import math
 import re
@@ -25,6 +24,7 @@ from sqlalchemy import text as sql_text
 from .. import db
 from ..models import (Document, DocumentEmbedding, Setting, Ticket,
                       TicketEmbedding, TicketAISuggestion)
+from ..utils.html_sanitize import ESCAPE_BR_TABLE
 
 HEALTH_TIMEOUT = 10
 EMBED_TIMEOUT = 180
@@ -511,7 +511,7 @@ def _plain_text_to_html(text):
     html_parts = []
     for p in paragraphs:
         if p.strip():
-            html_parts.append('<p>' + _html.escape(p.strip()).replace('\n', '<br>') + '</p>')
+            html_parts.append('<p>' + p.strip().translate(ESCAPE_BR_TABLE) + '</p>')
     return ''.join(html_parts)
 
 
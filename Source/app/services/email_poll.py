@@ -10,75 +10,185 @@ from .ms_graph import (
     get_unread_messages,
     get_message_html,
     list_attachments,
-    download_file_attachment,
-    mark_message_read,
+    download_attachment_to,
+    mark_messages_read,
     send_mail,
 )
 from pathlib import Path
 import re
 import html as _html
-import bleach
-from ..utils.html_sanitize import sanitize_email_html
+from ..utils.html_sanitize import ESCAPE_BR_TABLE, plain_text_to_html, sanitize_email_html
 import ftplib
 from io import BytesIO
 
 
+_SCRIPT_STYLE_RE = re.compile(r"<(script|style)[^>]*>.*?</\1>", re.I | re.S)
+_LINE_BREAK_RE = re.compile(r"<br\s*/?>|</p>", re.I)
+_TAG_RE = re.compile(r"<[^>]+>")
+# Subject references: "Approval Request - Ticket #N" replies, then "Ticket #N"
+_APPROVAL_SUBJECT_RE = re.compile(r"Approval\s+Request\s*[-–—]\s*Ticket\s*#?\s*(\d+)", re.I)
+_TICKET_SUBJECT_RE = re.compile(r"Ticket\s*#\s*(\d+)", re.I)
+
+
 def _html_to_text_lite(html: str) -> str:
     """Very light HTML to text: strip tags and unescape entities."""
     if not html:
         return ''
     # Remove script/style content
-    html = re.sub(r"<(script|style)[^>]*>.*?</\1>", "", html, flags=re.I | re.S)
+    html = _SCRIPT_STYLE_RE.sub("", html)
     # Replace <br> and </p> with newlines
-    html = re.sub(r"<br\s*/?>", "\n", html, flags=re.I)
-    html = re.sub(r"</p>", "\n", html, flags=re.I)
+    html = _LINE_BREAK_RE.sub("\n", html)
     # Strip remaining tags
-    text = re.sub(r"<[^>]+>", "", html)
+    text = _TAG_RE.sub("", html)
     # Unescape entities
     return _html.unescape(text).strip()
 
 
+# First line of the quoted/original message in a reply: one starting with our
+# own From header, Outlook's separators, "Sent from my ...", "> " quoting or
+# an "On <date> ... wrote:" attribution, or any line quoting our approval
+# subject. A single search finds it instead of testing every line.
+_REPLY_STOP_RE = re.compile(
+    r"^(?:[ \t]*(?:from:[ \t]*help[ \t]?desk"
+    r"|-----original message-----"
+    r"|_{32}"
+    r"|sent from"
+    r"|>[ \t]"
+    r"|on [^\n]*?(?:wrote:|sent:|at ))"
+    r"|[^\n]*approval request -)",
+    re.I | re.M,
+)
+
+# Manager replies to approval requests. Keywords match as substrings of the
+# lowercased reply (e.g. "approving" contains "approv"); the first-word sets
+# settle replies that match both lists or neither.
+_APPROVAL_KEYWORDS = ('approv', 'yes', 'confirmed', 'confirm', 'authorize', 'authoriz', 'granted', 'grant', 'accept', 'agreed', 'agree', 'proceed', 'go ahead', 'lgtm', 'looks good', 'sounds good', 'fine', 'okay', 'ok', '👍', '✓', '✅')
+_DENIAL_KEYWORDS = ('deny', 'denied', 'denial', 'no', 'reject', 'declined', 'decline', 'refused', 'refuse', 'disapprov', 'not approved', 'cannot approve', 'can\'t approve', 'dont approve', 'don\'t approve', 'hold off', 'wait', 'stop', '👎', '❌', '✗')
+_APPROVAL_FIRST_WORDS = frozenset(('approved', 'approve', 'yes', 'ok', 'okay', 'confirmed', 'granted', 'accepted', 'agreed', 'proceed', 'fine', 'lgtm', '👍', '✓', '✅'))
+_DENIAL_FIRST_WORDS = frozenset(('denied', 'deny', 'no', 'rejected', 'reject', 'declined', 'refused', 'stop', 'wait', 'hold', '👎', '❌', '✗'))
+
+# HDWish folder files imported as ticket attachments
+_FTP_IMAGE_EXTS = ('.png', '.jpg', '.jpeg', '.gif', '.bmp')
+
+
 def _extract_new_message_segment(text: str) -> str:
     """Keep only the new reply text and stop at common reply markers."""
     if not text:
         return ''
-    lines = text.splitlines()
-    out = []
-    # Common markers that indicate the start of quoted/original message
-    stop_markers = [
-        'from: help desk',
-        'from: helpdesk',
-        '-----original message-----',
-        '________________________________',
-        'on ', # "On Dec 3, 2025, at" style quotes
-        'sent from',
-        '> ',  # Quoted line marker
-        'approval request -',  # Our own subject being quoted
-    ]
-    for line in lines:
-        line_lower = line.lower().strip()
-        # Stop at quoted previous message marker
-        should_stop = False
-        for marker in stop_markers:
-            if marker in line_lower:
-                # For "on " marker, be more specific - must look like a date reference
-                if marker == 'on ' and not any(x in line_lower for x in ['wrote:', 'sent:', 'at ']):
-                    continue
-                should_stop = True
-                break
-        if should_stop:
-            break
-        out.append(line)
-    # Trim trailing blank lines
-    while out and not out[-1].strip():
-        out.pop()
-    result = "\n".join(out).strip()
+    stop = _REPLY_STOP_RE.search(text)
+    if stop:
+        text = text[:stop.start()]
+    result = "\n".join(text.splitlines()).strip()
     # Limit to reasonable length (500 chars max for response)
     if len(result) > 500:
         result = result[:500] + '...'
     return result
 
 
+def _classify_approval_reply(text: str):
+    """Classify a lowercased manager reply as 'approved', 'denied' or None (unclear).
+
+    Keyword hits decide; if both or neither list matches, the first word
+    breaks the tie, and approval wins a tie the first word can't settle.
+    """
+    approved = any(kw in text for kw in _APPROVAL_KEYWORDS)
+    denied = any(kw in text for kw in _DENIAL_KEYWORDS)
+    if approved == denied:
+        words = text.split(None, 1)
+        first_word = words[0] if words else ''
+        if first_word in _APPROVAL_FIRST_WORDS:
+            return 'approved'
+        if first_word in _DENIAL_FIRST_WORDS:
+            return 'denied'
+    if approved:
+        return 'approved'
+    if denied:
+        return 'denied'
+    return None
+
+
+def _unique_name(name: str, taken: set) -> str:
+    """Return ``name``, or ``stem_1.ext``, ``stem_2.ext``... if it's already in ``taken``.
+
+    ``taken`` holds lowercased names: NTFS (the Windows build) is
+    case-insensitive, so ``Scan.PDF`` collides with ``scan.pdf``.
+    """
+    if name.lower() not in taken:
+        return name
+    stem = Path(name).stem
+    suffix = Path(name).suffix
+    i = 1
+    while f"{stem}_{i}{suffix}".lower() in taken:
+        i += 1
+    return f"{stem}_{i}{suffix}"
+
+
+_ATTACHMENT_SETTING_KEYS = ('ATTACHMENTS_DIR_REL', 'ATTACHMENTS_BASE')
+
+
+def _attachment_location(cfg: dict):
+    """(relative subdir, root folder) for saved attachments, from the ATTACHMENTS_* values in `cfg`."""
+    subdir = (cfg.get('ATTACHMENTS_DIR_REL') or 'attachments').strip()
+    subdir = subdir.replace('\\','/').lstrip('/') or 'attachments'
+    base = (cfg.get('ATTACHMENTS_BASE') or 'instance').strip().lower()
+    root = current_app.static_folder if base == 'static' else current_app.instance_path
+    return subdir, root
+
+
+def _save_message_attachments(token: str, user_email: str, msg_id: str, ticket_id: int, atts: list = None, location: tuple = None) -> None:
+    """Save a message's PDF/image file attachments to the ticket's attachment folder.
+
+    `atts` is the attachment metadata already expanded into the message, if
+    any; otherwise it's listed from Graph. `location` is _attachment_location()
+    read once per run; otherwise it's looked up here. Each file is streamed from
+    Graph straight to disk (raw bytes via $value) rather than decoded from
+    base64 contentBytes in memory.
+    """
+    if atts is None:
+        atts = list_attachments(token, user_email, msg_id)
+    if location is None:
+        location = _attachment_location(Setting.get_many(_ATTACHMENT_SETTING_KEYS))
+    subdir, root = location
+    save_dir = Path(root) / subdir / str(ticket_id)
+    save_dir.mkdir(parents=True, exist_ok=True)
+    # List the folder once instead of stat-ing each candidate name
+    taken = {p.name.lower() for p in save_dir.iterdir()}
+    rows = []
+    for a in atts:
+        # Only file attachments (not item/refs)
+        if a.get('@odata.type') != '#microsoft.graph.fileAttachment':
+            continue
+        name = a.get('name') or 'attachment'
+        ctype = a.get('contentType') or ''
+        # Filter to PDFs and images
+        if not (ctype.startswith('image/') or ctype == 'application/pdf' or name.lower().endswith(('.png','.jpg','.jpeg','.gif','.pdf'))):
+            continue
+        # Avoid overwriting with same name
+        target = save_dir / _unique_name(name, taken)
+        try:
+            with open(target, 'wb') as fp:
+                size = download_attachment_to(token, user_email, msg_id, a.get('id'), fp)
+        except Exception:
+            size = 0
+        if not size:
+            # Failed or empty download: don't leave a partial file behind
+            target.unlink(missing_ok=True)
+            continue
+        taken.add(target.name.lower())
+        # Build a URL path with forward slashes for static serving
+        rel_path = f"{subdir}/{ticket_id}/{target.name}"
+        rows.append(dict(ticket_id=ticket_id, filename=target.name, content_type=ctype, static_path=rel_path, size_bytes=size))
+    # One executemany for the message's attachments
+    if rows:
+        db.session.execute(db.insert(TicketAttachment), rows)
+    # If no files were saved, remove the empty attachment directory
+    try:
+        if not taken:
+            save_dir.rmdir()
+    except Exception:
+        pass
+
+
 def poll_ms_graph(app=None):
     """Poll Microsoft Graph for unread emails.
 
@@ -107,16 +217,23 @@ def poll_ms_graph(app=None):
     except Exception:
         logger = None
 
-    start_ts = time.time()
-    now_iso = datetime.utcnow().replace(tzinfo=timezone.utc).isoformat()
+    # Monotonic clock for durations and the runtime cap (immune to clock changes)
+    start_ts = time.monotonic()
+    now_utc = datetime.now(timezone.utc)
+    now_iso = now_utc.isoformat()
     LOCK_FLAG_KEY = "EMAIL_POLL_RUNNING"
     LOCK_STARTED_KEY = "EMAIL_POLL_STARTED_AT"
     LAST_FINISHED_KEY = "EMAIL_POLL_LAST_FINISHED_AT"
     LAST_DURATION_KEY = "EMAIL_POLL_LAST_DURATION_MS"
     LAST_RESULT_KEY = "EMAIL_POLL_LAST_RESULT"
 
+    # Interval and lock state in one query
     try:
-        interval_setting = int(Setting.get("POLL_INTERVAL_SECONDS", os.getenv("POLL_INTERVAL_SECONDS", "60")))
+        poll_state = Setting.get_many(("POLL_INTERVAL_SECONDS", LOCK_FLAG_KEY, LOCK_STARTED_KEY))
+    except Exception:
+        poll_state = {}
+    try:
+        interval_setting = int(poll_state.get("POLL_INTERVAL_SECONDS") or os.getenv("POLL_INTERVAL_SECONDS", "60"))
     except Exception:
         interval_setting = 60
     stale_threshold = max(180, interval_setting * 5)
@@ -129,13 +246,13 @@ def poll_ms_graph(app=None):
     # Acquire / check lock
     skip_due_active = False
     try:
-        running_flag = Setting.get(LOCK_FLAG_KEY, "0")
-        started_at_val = Setting.get(LOCK_STARTED_KEY, "")
+        running_flag = poll_state.get(LOCK_FLAG_KEY) or "0"
+        started_at_val = poll_state.get(LOCK_STARTED_KEY) or ""
         stale = False
         if running_flag == "1" and started_at_val:
             try:
                 prev_dt = datetime.fromisoformat(started_at_val)
-                age = (datetime.utcnow().replace(tzinfo=timezone.utc) - prev_dt).total_seconds()
+                age = (now_utc - prev_dt).total_seconds()
                 if age > stale_threshold:
                     stale = True
                     if logger:
@@ -147,8 +264,7 @@ def poll_ms_graph(app=None):
                 logger.info("email_poll: previous run still active; skipping")
             skip_due_active = True
         else:
-            Setting.set(LOCK_FLAG_KEY, "1")
-            Setting.set(LOCK_STARTED_KEY, now_iso)
+            Setting.set_many({LOCK_FLAG_KEY: "1", LOCK_STARTED_KEY: now_iso})
     except Exception:
         if logger:
             logger.warning("email_poll: lock acquisition failed; proceeding anyway")
@@ -159,9 +275,21 @@ def poll_ms_graph(app=None):
             ctx.pop()
         return
 
+    # The run commits as it goes and keeps reading the same rows afterwards
+    # (the EmailCheck for every log entry, replied-to tickets, approvals), so
+    # don't expire them on commit and re-SELECT each one
+    session = db.session()
+    expire_on_commit = session.expire_on_commit
+    session.expire_on_commit = False
+    # EmailCheckEntry rows collected during the run; inserted in one
+    # executemany at the end instead of one INSERT per message
+    check_entries = []
     try:
+        # The settings this run reads, in one query
+        cfg = Setting.get_many(('MS_ENABLED', 'MS_USER_EMAIL', 'EMAIL_LOG_NO_NEW_MESSAGES', 'FTP_ENABLED') + _ATTACHMENT_SETTING_KEYS)
+        att_location = _attachment_location(cfg)
         # Determine which services are enabled
-        ms_enabled = (Setting.get('MS_ENABLED', '1') or '1') in ('1','true','on','yes')
+        ms_enabled = (cfg.get('MS_ENABLED') or '1') in ('1','true','on','yes')
         # Create an EmailCheck row up front so FTP-only runs still have a place to log
         check = EmailCheck(checked_at=datetime.utcnow(), new_count=0)
         db.session.add(check)
@@ -172,17 +300,13 @@ def poll_ms_graph(app=None):
         user_email = None
         if ms_enabled:
             msal_app = get_msal_app()
-            user_email = Setting.get("MS_USER_EMAIL", None) or os.getenv("MS_USER_EMAIL")
+            user_email = cfg.get("MS_USER_EMAIL") or os.getenv("MS_USER_EMAIL")
             if msal_app and user_email:
                 token = get_access_token(msal_app)
                 if token:
                     messages = get_unread_messages(token, user_email) or []
-                    # Update check with message count
-                    try:
-                        check.new_count = len(messages)
-                        db.session.commit()
-                    except Exception:
-                        db.session.rollback()
+                    # Update check with message count (committed with the run)
+                    check.new_count = len(messages)
                 else:
                     if logger:
                         logger.warning("email_poll: could not acquire token; skipping MS Graph")
@@ -193,26 +317,27 @@ def poll_ms_graph(app=None):
         # If MS enabled and we had no messages, add a 'none' log for visibility
         # (suppressible via EMAIL_LOG_NO_NEW_MESSAGES so logs don't fill up when healthy)
         if ms_enabled and not messages:
-            log_none = (Setting.get('EMAIL_LOG_NO_NEW_MESSAGES', '1') or '1') in ('1', 'true', 'on', 'yes')
+            log_none = (cfg.get('EMAIL_LOG_NO_NEW_MESSAGES') or '1') in ('1', 'true', 'on', 'yes')
             if log_none:
-                try:
-                    db.session.add(EmailCheckEntry(check_id=check.id, sender='', subject='No New Messages', action='none', ticket_id=None, note=''))
-                    db.session.commit()
-                except Exception:
-                    db.session.rollback()
+                check_entries.append(dict(created_at=datetime.utcnow(), check_id=check.id, sender='', subject='No New Messages', action='none', ticket_id=None, note=''))
         tickets_created = 0
         notes_created = 0
         to_mark_read = []
-        allowed = set(d.domain.lower() for d in AllowedDomain.query.all())
-        deny_phrases = [d.phrase.lower() for d in DenyFilter.query.all()]
+        allowed = {d.lower() for (d,) in db.session.query(AllowedDomain.domain) if d}
+        deny_phrases = [p.lower() for (p,) in db.session.query(DenyFilter.phrase) if p]
+        # Messages already imported as tickets, in one query for the batch
+        msg_ids = [m.get("id") for m in messages if m.get("id")]
+        imported_ids = {
+            eid for (eid,) in db.session.query(Ticket.external_id).filter(Ticket.external_id.in_(msg_ids))
+        } if msg_ids else set()
 
         if logger:
             logger.info("email_poll: start messages=%d interval=%ds max_runtime=%ds (ms_enabled=%s)", len(messages), interval_setting, max_runtime, str(ms_enabled))
 
         for idx, m in enumerate(messages):
-            if (time.time() - start_ts) > max_runtime:
+            if (time.monotonic() - start_ts) > max_runtime:
                 if logger:
-                    logger.error("email_poll: aborting run after %ss (max=%s) processed=%d", int(time.time()-start_ts), max_runtime, idx)
+                    logger.error("email_poll: aborting run after %ss (max=%s) processed=%d", int(time.monotonic()-start_ts), max_runtime, idx)
                 result_status = "timeout_abort"
                 break
             msg_id = m.get("id")
@@ -240,26 +365,33 @@ def poll_ms_graph(app=None):
 
             requester_addr = reply_addr or from_addr
             requester_name = reply_name or from_name
-            # Prefer full HTML body
-            body_html = get_message_html(token, user_email, msg_id) or m.get("bodyPreview") or ""
+            # Prefer full HTML body; the list response already carries it, so
+            # only fetch the message again if it came back without one
+            body_html = (
+                (m.get("body") or {}).get("content")
+                or get_message_html(token, user_email, msg_id)
+                or m.get("bodyPreview")
+                or ""
+            )
+            # Attachment metadata is expanded into the list response. If it's
+            # missing, fall back to hasAttachments, which ignores inline images
+            # (pasted screenshots), so also look for cid: references
+            attachments = m.get("attachments")
+            if attachments is not None:
+                has_files = bool(attachments)
+            else:
+                has_files = bool(m.get("hasAttachments")) or 'cid:' in body_html
 
             # Deny filter: if any phrase appears in subject, mark read and skip
             subj_lc = subject.lower()
             if deny_phrases and any(p in subj_lc for p in deny_phrases):
-                try:
-                    mark_message_read(token, user_email, msg_id)
-                except Exception:
-                    pass
-                try:
-                    db.session.add(EmailCheckEntry(check_id=check.id, sender=(reply_addr or from_addr or ''), subject=subject or '', action='filtered_deny', ticket_id=None, note='Matched deny filter'))
-                    db.session.commit()
-                except Exception:
-                    db.session.rollback()
+                to_mark_read.append(msg_id)
+                check_entries.append(dict(created_at=datetime.utcnow(), check_id=check.id, sender=(reply_addr or from_addr or ''), subject=subject or '', action='filtered_deny', ticket_id=None, note='Matched deny filter'))
                 continue
 
             # Check for Approval Request replies first (before regular ticket replies)
             # Subject format: "RE: Approval Request - Ticket#<id> - ..."
-            approval_match = re.search(r"Approval\s+Request\s*[-–—]\s*Ticket\s*#?\s*(\d+)", subject or "", flags=re.I)
+            approval_match = _APPROVAL_SUBJECT_RE.search(subject or "")
             if approval_match:
                 try:
                     tid = int(approval_match.group(1))
@@ -277,7 +409,7 @@ def poll_ms_graph(app=None):
                             .filter(
                                 ApprovalRequest.ticket_id == tid,
                                 ApprovalRequest.status == 'pending',
-                                Contact.email.ilike(sender_email)
+                                db.func.lower(Contact.email) == sender_email
                             )
                             .first()
                         )
@@ -287,34 +419,13 @@ def poll_ms_graph(app=None):
                             new_text = _extract_new_message_segment(text_body)
                             response_text = (new_text or text_body or (m.get("bodyPreview") or "")).strip().lower()
                             
-                            # Determine if approved or denied using expanded word lists
-                            # Approval keywords (partial matches work - e.g., "approving" contains "approv")
-                            approval_keywords = ['approv', 'yes', 'confirmed', 'confirm', 'authorize', 'authoriz', 'granted', 'grant', 'accept', 'agreed', 'agree', 'proceed', 'go ahead', 'lgtm', 'looks good', 'sounds good', 'fine', 'okay', 'ok', '👍', '✓', '✅']
-                            # Denial keywords
-                            denial_keywords = ['deny', 'denied', 'denial', 'no', 'reject', 'declined', 'decline', 'refused', 'refuse', 'disapprov', 'not approved', 'cannot approve', 'can\'t approve', 'dont approve', 'don\'t approve', 'hold off', 'wait', 'stop', '👎', '❌', '✗']
-                            
-                            is_approved = any(kw in response_text for kw in approval_keywords)
-                            is_denied = any(kw in response_text for kw in denial_keywords)
-                            
-                            # If both or neither, check the first word more strictly
-                            if (is_approved and is_denied) or (not is_approved and not is_denied):
-                                first_word = response_text.split()[0] if response_text.split() else ''
-                                # Strict first-word matching for ambiguous cases
-                                approval_first_words = ['approved', 'approve', 'yes', 'ok', 'okay', 'confirmed', 'granted', 'accepted', 'agreed', 'proceed', 'fine', 'lgtm', '👍', '✓', '✅']
-                                denial_first_words = ['denied', 'deny', 'no', 'rejected', 'reject', 'declined', 'refused', 'stop', 'wait', 'hold', '👎', '❌', '✗']
-                                if first_word in approval_first_words:
-                                    is_approved = True
-                                    is_denied = False
-                                elif first_word in denial_first_words:
-                                    is_denied = True
-                                    is_approved = False
+                            decision = _classify_approval_reply(response_text)
                             
                             # Update the approval request
-                            from datetime import datetime as _dt
-                            if is_approved:
+                            if decision == 'approved':
                                 pending_approval.status = 'approved'
                                 status_text = 'APPROVED'
-                            elif is_denied:
+                            elif decision == 'denied':
                                 pending_approval.status = 'denied'
                                 status_text = 'DENIED'
                             else:
@@ -322,14 +433,14 @@ def poll_ms_graph(app=None):
                                 status_text = 'RESPONSE RECEIVED (unclear)'
                             
                             pending_approval.response_note = new_text or text_body or ''
-                            pending_approval.responded_at = _dt.utcnow()
+                            pending_approval.responded_at = datetime.utcnow()
                             
                             # Add a note to the ticket
                             manager = pending_approval.manager_contact
                             note_content = f"<p><strong>Approval Response: {status_text}</strong></p>"
                             note_content += f"<p>From: {manager.name or manager.email} ({manager.email})</p>"
                             if new_text:
-                                note_content += f"<p>Response: {_html.escape(new_text).replace(chr(10),'<br>')}</p>"
+                                note_content += f"<p>Response: {new_text.translate(ESCAPE_BR_TABLE)}</p>"
                             
                             approval_note = TicketNote(
                                 ticket_id=existing_ticket.id,
@@ -347,7 +458,7 @@ def poll_ms_graph(app=None):
                                     tech_body = f"""
                                     <p>Hello {tech.name or 'Tech'},</p>
                                     <p>The approval request for <strong>Ticket #{existing_ticket.id} - {existing_ticket.subject}</strong> has been <strong>{status_text}</strong> by {manager.name or manager.email}.</p>
-                                    {f'<p><strong>Manager Response:</strong> {_html.escape(new_text or "").replace(chr(10),"<br>")}</p>' if new_text else ''}
+                                    {f'<p><strong>Manager Response:</strong> {new_text.translate(ESCAPE_BR_TABLE)}</p>' if new_text else ''}
                                     <p>Thank you,<br>Help Desk</p>
                                     """
                                     send_mail(tech.email, tech_subject, tech_body, to_name=tech.name, category='approval_response', ticket_id=existing_ticket.id)
@@ -355,7 +466,9 @@ def poll_ms_graph(app=None):
                                 pass
                             
                             try:
-                                db.session.add(EmailCheckEntry(
+                                db.session.commit()
+                                check_entries.append(dict(
+                                    created_at=datetime.utcnow(),
                                     check_id=check.id,
                                     sender=sender_email,
                                     subject=subject or '',
@@ -363,7 +476,6 @@ def poll_ms_graph(app=None):
                                     ticket_id=existing_ticket.id,
                                     note=f'Approval {status_text}'
                                 ))
-                                db.session.commit()
                             except Exception:
                                 db.session.rollback()
                             
@@ -372,23 +484,20 @@ def poll_ms_graph(app=None):
                         else:
                             # No pending approval found (already processed, wrong sender, etc.)
                             # Still mark as read and skip to avoid duplicate processing
-                            try:
-                                db.session.add(EmailCheckEntry(
-                                    check_id=check.id,
-                                    sender=sender_email,
-                                    subject=subject or '',
-                                    action='approval_no_pending',
-                                    ticket_id=existing_ticket.id,
-                                    note='Approval reply but no pending request found'
-                                ))
-                                db.session.commit()
-                            except Exception:
-                                db.session.rollback()
+                            check_entries.append(dict(
+                                created_at=datetime.utcnow(),
+                                check_id=check.id,
+                                sender=sender_email,
+                                subject=subject or '',
+                                action='approval_no_pending',
+                                ticket_id=existing_ticket.id,
+                                note='Approval reply but no pending request found'
+                            ))
                             to_mark_read.append(msg_id)
                             continue
 
             # If subject includes Ticket #<id> (with or without space), treat as a reply note instead of a new ticket
-            ticket_match = re.search(r"Ticket\s*#\s*(\d+)", subject or "", flags=re.I)
+            ticket_match = _TICKET_SUBJECT_RE.search(subject or "")
             if ticket_match:
                 try:
                     tid = int(ticket_match.group(1))
@@ -401,16 +510,6 @@ def poll_ms_graph(app=None):
                         text_body = _html_to_text_lite(body_html)
                         new_text = _extract_new_message_segment(text_body)
                         note_content = new_text or text_body or (m.get("bodyPreview") or "")
-                        # Convert to safe HTML with links and line breaks
-                        def _set_target_rel(attrs, new=False):
-                            href = attrs.get('href')
-                            if href:
-                                attrs['target'] = '_blank'
-                                rel = attrs.get('rel', '') or ''
-                                rel_vals = set(rel.split()) if rel else set()
-                                rel_vals.update(['noopener', 'noreferrer'])
-                                attrs['rel'] = ' '.join(sorted(rel_vals))
-                            return attrs
                         # If ticket was closed, move it back to in_progress on customer reply
                         try:
                             if TicketStatus.is_status_closed(existing.status):
@@ -418,58 +517,21 @@ def poll_ms_graph(app=None):
                                 existing.closed_at = None
                         except Exception:
                             pass
-                        # Build sanitized HTML for note
-                        note_html = bleach.linkify(_html.escape(note_content).replace('\n','<br>'), callbacks=[_set_target_rel])
+                        # Convert to safe HTML with links and line breaks
+                        note_html = plain_text_to_html(note_content)
                         # Notes created from replies are system-received; leave is_private as None/False
                         note = TicketNote(ticket_id=existing.id, author_id=None, content=note_html, is_private=False)
                         db.session.add(note)
                         # Save attachments for replies as well (PDFs and images)
-                        try:
-                            atts = list_attachments(token, user_email, msg_id)
-                            subdir = (Setting.get('ATTACHMENTS_DIR_REL', 'attachments') or 'attachments').strip()
-                            subdir = subdir.replace('\\','/').lstrip('/') or 'attachments'
-                            base = (Setting.get('ATTACHMENTS_BASE', 'instance') or 'instance').strip().lower()
-                            root = current_app.static_folder if base == 'static' else current_app.instance_path
-                            save_dir = Path(root) / subdir / str(existing.id)
-                            save_dir.mkdir(parents=True, exist_ok=True)
-                            for a in atts:
-                                if a.get('@odata.type') != '#microsoft.graph.fileAttachment':
-                                    continue
-                                name = a.get('name') or 'attachment'
-                                ctype = a.get('contentType') or ''
-                                if not (ctype.startswith('image/') or ctype == 'application/pdf' or name.lower().endswith(('.png','.jpg','.jpeg','.gif','.pdf'))):
-                                    continue
-                                content = a.get('contentBytes')
-                                if content is None:
-                                    full = download_file_attachment(token, user_email, a.get('id'))
-                                    if full:
-                                        content = full.get('contentBytes')
-                                if not content:
-                                    continue
-                                import base64
-                                data = base64.b64decode(content)
-                                target = save_dir / name
-                                i = 1
-                                while target.exists():
-                                    stem = Path(name).stem
-                                    suffix = Path(name).suffix
-                                    target = save_dir / f"{stem}_{i}{suffix}"
-                                    i += 1
-                                target.write_bytes(data)
-                                rel_path = f"{subdir}/{existing.id}/{target.name}"
-                                db.session.add(TicketAttachment(ticket_id=existing.id, filename=target.name, content_type=ctype, static_path=rel_path, size_bytes=len(data)))
-                            # If no files were saved, remove the empty attachment directory
+                        if has_files:
                             try:
-                                if save_dir.exists() and not any(save_dir.iterdir()):
-                                    save_dir.rmdir()
+                                _save_message_attachments(token, user_email, msg_id, existing.id, attachments, att_location)
                             except Exception:
                                 pass
-                        except Exception:
-                            pass
                         notes_created += 1
                         try:
-                            db.session.add(EmailCheckEntry(check_id=check.id, sender=(reply_addr or from_addr or ''), subject=subject or '', action='append_ticket', ticket_id=existing.id, note=f'Reply to Ticket #{existing.id}'))
                             db.session.commit()
+                            check_entries.append(dict(created_at=datetime.utcnow(), check_id=check.id, sender=(reply_addr or from_addr or ''), subject=subject or '', action='append_ticket', ticket_id=existing.id, note=f'Reply to Ticket #{existing.id}'))
                         except Exception:
                             db.session.rollback()
                         # New requester message: refresh the AI-suggested reply
@@ -488,7 +550,7 @@ def poll_ms_graph(app=None):
                                 recipient_ids.append(existing.co_assignee_id)
                             if recipient_ids:
                                 subj = f"Ticket#{existing.id} - New reply"
-                                html_body = f"<p>{_html.escape(note_content).replace('\n','<br>')}</p>"
+                                html_body = f"<p>{note_content.translate(ESCAPE_BR_TABLE)}</p>"
                                 for uid in recipient_ids:
                                     tech = User.query.get(uid)
                                     if tech and tech.email:
@@ -503,24 +565,13 @@ def poll_ms_graph(app=None):
                 domain = (from_addr.split('@')[-1] or '').lower()
                 if domain not in allowed:
                     # Not allowed: mark as read and skip importing
-                    try:
-                        mark_message_read(token, user_email, msg_id)
-                    except Exception:
-                        pass
-                    try:
-                        db.session.add(EmailCheckEntry(check_id=check.id, sender=(reply_addr or from_addr or ''), subject=subject or '', action='filtered_domain', ticket_id=None, note=f'Domain not allowed: {domain}'))
-                        db.session.commit()
-                    except Exception:
-                        db.session.rollback()
+                    to_mark_read.append(msg_id)
+                    check_entries.append(dict(created_at=datetime.utcnow(), check_id=check.id, sender=(reply_addr or from_addr or ''), subject=subject or '', action='filtered_domain', ticket_id=None, note=f'Domain not allowed: {domain}'))
                     continue
 
             # Deduplicate by external_id (skip importing duplicates) for new tickets
-            if Ticket.query.filter_by(external_id=msg_id).first():
-                try:
-                    db.session.add(EmailCheckEntry(check_id=check.id, sender=(reply_addr or from_addr or ''), subject=subject or '', action='duplicate', ticket_id=None, note='Duplicate external_id'))
-                    db.session.commit()
-                except Exception:
-                    db.session.rollback()
+            if msg_id in imported_ids:
+                check_entries.append(dict(created_at=datetime.utcnow(), check_id=check.id, sender=(reply_addr or from_addr or ''), subject=subject or '', action='duplicate', ticket_id=None, note='Duplicate external_id'))
                 continue
 
             # Upsert contact by email
@@ -548,106 +599,53 @@ def poll_ms_graph(app=None):
             db.session.add(t)
             tickets_created += 1
             db.session.flush()  # ensure t.id
+            imported_ids.add(msg_id)
             try:
-                db.session.add(EmailCheckEntry(check_id=check.id, sender=(reply_addr or from_addr or ''), subject=subject or '', action='new_ticket', ticket_id=t.id, note='Created new ticket'))
                 db.session.commit()
+                check_entries.append(dict(created_at=datetime.utcnow(), check_id=check.id, sender=(reply_addr or from_addr or ''), subject=subject or '', action='new_ticket', ticket_id=t.id, note='Created new ticket'))
             except Exception:
                 db.session.rollback()
             to_mark_read.append(msg_id)
             # Save attachments (PDFs and images)
-            try:
-                atts = list_attachments(token, user_email, msg_id)
-                subdir = (Setting.get('ATTACHMENTS_DIR_REL', 'attachments') or 'attachments').strip()
-                subdir = subdir.replace('\\','/').lstrip('/') or 'attachments'
-                base = (Setting.get('ATTACHMENTS_BASE', 'instance') or 'instance').strip().lower()
-                root = current_app.static_folder if base == 'static' else current_app.instance_path
-                save_dir = Path(root) / subdir / str(t.id)
-                save_dir.mkdir(parents=True, exist_ok=True)
-                for a in atts:
-                    # Only file attachments (not item/refs)
-                    if a.get('@odata.type') != '#microsoft.graph.fileAttachment':
-                        continue
-                    name = a.get('name') or 'attachment'
-                    ctype = a.get('contentType') or ''
-                    # Filter to PDFs and images
-                    if not (ctype.startswith('image/') or ctype == 'application/pdf' or name.lower().endswith(('.png','.jpg','.jpeg','.gif','.pdf'))):
-                        continue
-                    # Download attachment content (base64 in contentBytes via attachments/{id} or inline in list)
-                    content = a.get('contentBytes')
-                    if content is None:
-                        full = download_file_attachment(token, user_email, a.get('id'))
-                        if full:
-                            content = full.get('contentBytes')
-                    if not content:
-                        continue
-                    import base64
-                    data = base64.b64decode(content)
-                    target = save_dir / name
-                    # Avoid overwriting with same name
-                    i = 1
-                    while target.exists():
-                        stem = Path(name).stem
-                        suffix = Path(name).suffix
-                        target = save_dir / f"{stem}_{i}{suffix}"
-                        i += 1
-                    target.write_bytes(data)
-                    # Build a URL path with forward slashes for static serving
-                    rel_path = f"{subdir}/{t.id}/{target.name}"
-                    db.session.add(TicketAttachment(ticket_id=t.id, filename=target.name, content_type=ctype, static_path=rel_path, size_bytes=len(data)))
-                # If no files were saved, remove the empty attachment directory
+            if has_files:
                 try:
-                    if save_dir.exists() and not any(save_dir.iterdir()):
-                        save_dir.rmdir()
+                    _save_message_attachments(token, user_email, msg_id, t.id, attachments, att_location)
                 except Exception:
+                    # Don’t fail the whole cycle on attachment issues
                     pass
-            except Exception:
-                # Don’t fail the whole cycle on attachment issues
-                pass
 
         # After processing email, optionally poll FTP (HDWish)
-        try:
-            ftp_enabled = (Setting.get('FTP_ENABLED', '0') or '0') in ('1','true','on','yes')
-        except Exception:
-            ftp_enabled = False
+        ftp_enabled = (cfg.get('FTP_ENABLED') or '0') in ('1','true','on','yes')
         if ftp_enabled:
             try:
-                created_ftp = _poll_ftp_and_import(check)
+                created_ftp = _poll_ftp_and_import(check, check_entries)
                 tickets_created += (created_ftp or 0)
             except Exception as _e:
                 # Log a failure entry for visibility
-                try:
-                    db.session.add(EmailCheckEntry(check_id=check.id, sender='', subject='FTP Import Error', action='error', ticket_id=None, note=str(_e)))
-                    db.session.commit()
-                except Exception:
-                    db.session.rollback()
+                check_entries.append(dict(created_at=datetime.utcnow(), check_id=check.id, sender='', subject='FTP Import Error', action='error', ticket_id=None, note=str(_e)))
 
-        if tickets_created or notes_created:
-            db.session.commit()
-        # After successful processing, mark messages as read
+        # New-ticket attachments and the message count aren't committed
+        # individually; write them in one go
+        db.session.commit()
+        # After successful processing, mark messages as read (filtered ones
+        # too), 20 per Graph $batch request
         if to_mark_read:
-            for mid in to_mark_read:
-                try:
-                    mark_message_read(token, user_email, mid)
-                except Exception:
-                    pass
+            try:
+                mark_messages_read(token, user_email, to_mark_read)
+            except Exception:
+                pass
         if result_status == "unknown":
             result_status = "ok"
         # Cleanup old email logs (>7 days)
         try:
             from datetime import timedelta as _td
             cutoff = datetime.utcnow() - _td(days=7)
-            old = EmailCheck.query.filter(EmailCheck.checked_at < cutoff).all()
-            if old:
-                for c in old:
-                    try:
-                        db.session.delete(c)
-                    except Exception:
-                        pass
+            if EmailCheck.delete_older_than(cutoff):
                 db.session.commit()
         except Exception:
             db.session.rollback()
         if logger:
-            logger.info("email_poll: finished tickets_created=%d notes_created=%d duration_ms=%d status=%s", tickets_created, notes_created, int((time.time()-start_ts)*1000), result_status)
+            logger.info("email_poll: finished tickets_created=%d notes_created=%d duration_ms=%d status=%s", tickets_created, notes_created, int((time.monotonic()-start_ts)*1000), result_status)
     except Exception as e:
         # Log to Flask logger if available
         try:
@@ -655,36 +653,53 @@ def poll_ms_graph(app=None):
         except Exception:
             pass
         result_status = "exception"
+        # A failed flush leaves the transaction unusable; clear it so the
+        # log entries and lock release below can still be written
+        db.session.rollback()
     finally:
+        # Write the run's log entries, even if it failed part way through
+        if check_entries:
+            try:
+                db.session.execute(db.insert(EmailCheckEntry), check_entries)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                if logger:
+                    logger.warning("email_poll: failed to write check log entries")
         # Release lock & persist metrics
         try:
-            Setting.set(LOCK_FLAG_KEY, "0")
-            Setting.set(LAST_FINISHED_KEY, datetime.utcnow().replace(tzinfo=timezone.utc).isoformat())
-            Setting.set(LAST_DURATION_KEY, str(int((time.time()-start_ts)*1000)))
-            Setting.set(LAST_RESULT_KEY, result_status)
+            Setting.set_many({
+                LOCK_FLAG_KEY: "0",
+                LAST_FINISHED_KEY: datetime.now(timezone.utc).isoformat(),
+                LAST_DURATION_KEY: str(int((time.monotonic()-start_ts)*1000)),
+                LAST_RESULT_KEY: result_status,
+            })
         except Exception:
             if logger:
                 logger.warning("email_poll: failed to record metrics / release lock")
+        session.expire_on_commit = expire_on_commit
         if ctx is not None:
             ctx.pop()
 
 
-def _poll_ftp_and_import(check_row: EmailCheck) -> int:
+def _poll_ftp_and_import(check_row: EmailCheck, check_entries: list) -> int:
     """Poll configured FTP for HDWish ticket folders and import them.
 
     Returns count of tickets created.
     """
-    host = Setting.get('FTP_HOST', '')
+    cfg = Setting.get_many(('FTP_HOST', 'FTP_PORT', 'FTP_USER', 'FTP_PASS', 'FTP_BASE_DIR', 'FTP_SUBDIR') + _ATTACHMENT_SETTING_KEYS)
+    host = cfg.get('FTP_HOST') or ''
     try:
-        port = int(Setting.get('FTP_PORT', '21') or '21')
+        port = int(cfg.get('FTP_PORT') or '21')
     except Exception:
         port = 21
-    user = Setting.get('FTP_USER', '') or 'anonymous'
-    pwd = Setting.get('FTP_PASS', '') or ''
-    base = (Setting.get('FTP_BASE_DIR', '') or '').strip()
-    subdir = (Setting.get('FTP_SUBDIR', 'HDWish Data') or 'HDWish Data').strip()
+    user = cfg.get('FTP_USER') or 'anonymous'
+    pwd = cfg.get('FTP_PASS') or ''
+    base = (cfg.get('FTP_BASE_DIR') or '').strip()
+    subdir = (cfg.get('FTP_SUBDIR') or 'HDWish Data').strip()
     if not host:
         return 0
+    subdir_rel, att_root = _attachment_location(cfg)
     ftp = ftplib.FTP()
     ftp.connect(host, port, timeout=15)
     ftp.login(user=user, passwd=pwd)
@@ -694,7 +709,7 @@ def _poll_ftp_and_import(check_row: EmailCheck) -> int:
     if subdir:
         ftp.cwd(subdir)
 
-    # Helper to check if name is directory by attempting cwd
+    # Fallback check (servers without MLSD) that name is a directory by attempting cwd
     def is_dir(name: str) -> bool:
         cur = ftp.pwd()
         try:
@@ -708,22 +723,34 @@ def _poll_ftp_and_import(check_row: EmailCheck) -> int:
                 pass
             return False
 
-    folders = ftp.nlst()
+    # MLSD types every entry in one round trip; without it, list names and
+    # probe each candidate with is_dir()
+    try:
+        folders = [name for name, facts in ftp.mlsd(facts=['type']) if (facts.get('type') or '').lower() == 'dir']
+        probe_dirs = False
+    except ftplib.error_perm:
+        folders = ftp.nlst()
+        probe_dirs = True
     created = 0
+    # Folders imported on earlier runs, in one query instead of one per folder
+    id_prefix = f"ftp://{host}/{(base + '/' if base else '')}{subdir}/"
+    imported = {
+        eid for (eid,) in db.session.query(Ticket.external_id).filter(
+            Ticket.external_id.startswith(id_prefix, autoescape=True)
+        )
+    }
     for folder in folders:
         # Ignore obvious files
         if '.' in (folder or ''):
             continue
-        if not is_dir(folder):
+        # Unique external_id for dedupe; checked before any is_dir() probe
+        # since an imported name was a folder and the probe costs round trips
+        external_id = f"{id_prefix}{folder}"
+        if external_id in imported:
+            # Log-only; committed with the poll run
+            check_entries.append(dict(created_at=datetime.utcnow(), check_id=check_row.id, sender='', subject=folder, action='duplicate', ticket_id=None, note='FTP folder already imported'))
             continue
-        # Unique external_id for dedupe
-        external_id = f"ftp://{host}/{(base + '/' if base else '')}{subdir}/{folder}"
-        if Ticket.query.filter_by(external_id=external_id).first():
-            try:
-                db.session.add(EmailCheckEntry(check_id=check_row.id, sender='', subject=folder, action='duplicate', ticket_id=None, note='FTP folder already imported'))
-                db.session.commit()
-            except Exception:
-                db.session.rollback()
+        if probe_dirs and not is_dir(folder):
             continue
         # Enter folder and find note.txt (case-insensitive)
         ftp.cwd(folder)
@@ -736,11 +763,7 @@ def _poll_ftp_and_import(check_row: EmailCheck) -> int:
         if not notes_name:
             # No notes file; skip folder
             ftp.cwd('..')
-            try:
-                db.session.add(EmailCheckEntry(check_id=check_row.id, sender='', subject=folder, action='skip', ticket_id=None, note='No note.txt'))
-                db.session.commit()
-            except Exception:
-                db.session.rollback()
+            check_entries.append(dict(created_at=datetime.utcnow(), check_id=check_row.id, sender='', subject=folder, action='skip', ticket_id=None, note='No note.txt'))
             continue
         # Download note.txt
         buf = BytesIO()
@@ -759,7 +782,7 @@ def _poll_ftp_and_import(check_row: EmailCheck) -> int:
                 contact = Contact(email=requester_email.lower())
                 db.session.add(contact)
         # Build body as simple HTML
-        body_html = _html.escape(rest or '').replace('\n', '<br>') if rest else '(no details)'
+        body_html = rest.translate(ESCAPE_BR_TABLE) if rest else '(no details)'
         t = Ticket(
             external_id=external_id,
             subject=subject,
@@ -774,7 +797,7 @@ def _poll_ftp_and_import(check_row: EmailCheck) -> int:
         # Attempt asset match by serial number
         try:
             if serial_no:
-                a = Asset.query.filter_by(serial_number=serial_no).first()
+                a = Asset.query.filter(db.func.lower(Asset.serial_number) == serial_no.lower()).first()
                 if a:
                     t.asset_id = a.id
         except Exception:
@@ -790,41 +813,39 @@ def _poll_ftp_and_import(check_row: EmailCheck) -> int:
         
         # Download images as attachments (if any exist)
         try:
-            subdir_rel = (Setting.get('ATTACHMENTS_DIR_REL', 'attachments') or 'attachments').strip()
-            subdir_rel = subdir_rel.replace('\\','/').lstrip('/') or 'attachments'
-            base_loc = (Setting.get('ATTACHMENTS_BASE', 'instance') or 'instance').strip().lower()
-            root = current_app.static_folder if base_loc == 'static' else current_app.instance_path
-            save_dir = Path(root) / subdir_rel / str(t.id)
+            save_dir = Path(att_root) / subdir_rel / str(t.id)
             save_dir.mkdir(parents=True, exist_ok=True)
-            exts = ('.png','.jpg','.jpeg','.gif','.bmp')
+            taken = {p.name.lower() for p in save_dir.iterdir()}
+            rows = []
             for nm in items:
-                if nm.lower() == notes_name.lower():
+                # Images only (this also skips note.txt)
+                if not nm.lower().endswith(_FTP_IMAGE_EXTS):
                     continue
-                if not nm.lower().endswith(exts):
-                    continue
-                out = BytesIO()
-                ftp.retrbinary(f'RETR {nm}', out.write)
-                data = out.getvalue()
-                if not data:
+                # Stream straight to the file rather than buffering in memory
+                target = save_dir / _unique_name(nm, taken)
+                try:
+                    with open(target, 'wb') as fp:
+                        ftp.retrbinary(f'RETR {nm}', fp.write, blocksize=65536)
+                        size = fp.tell()
+                except Exception:
+                    size = 0
+                if not size:
+                    # Failed or empty download: don't leave a partial file behind
+                    target.unlink(missing_ok=True)
                     continue
-                target = save_dir / nm
-                i = 1
-                while target.exists():
-                    stem = Path(nm).stem
-                    suffix = Path(nm).suffix
-                    target = save_dir / f"{stem}_{i}{suffix}"
-                    i += 1
-                target.write_bytes(data)
+                taken.add(target.name.lower())
                 rel_path = f"{subdir_rel}/{t.id}/{target.name}"
-                db.session.add(TicketAttachment(ticket_id=t.id, filename=target.name, content_type='', static_path=rel_path, size_bytes=len(data)))
+                rows.append(dict(ticket_id=t.id, filename=target.name, content_type='', static_path=rel_path, size_bytes=size))
                 # Remove image from FTP after successful import of this file
                 try:
                     ftp.delete(nm)
                 except Exception:
                     pass
+            if rows:
+                db.session.execute(db.insert(TicketAttachment), rows)
             # If no files were saved, remove the empty attachment directory
             try:
-                if save_dir.exists() and not any(save_dir.iterdir()):
+                if not taken:
                     save_dir.rmdir()
             except Exception:
                 pass
@@ -832,8 +853,8 @@ def _poll_ftp_and_import(check_row: EmailCheck) -> int:
             pass
         # Log creation
         try:
-            db.session.add(EmailCheckEntry(check_id=check_row.id, sender=requester_email or '', subject=subject or folder, action='new_ticket', ticket_id=t.id, note='FTP import'))
             db.session.commit()
+            check_entries.append(dict(created_at=datetime.utcnow(), check_id=check_row.id, sender=requester_email or '', subject=subject or folder, action='new_ticket', ticket_id=t.id, note='FTP import'))
         except Exception:
             db.session.rollback()
         created += 1
@@ -889,22 +910,21 @@ def email_poll_watchdog(app=None):
     except Exception:
         logger = None
     try:
-        running_flag = Setting.get("EMAIL_POLL_RUNNING", "0")
-        started_at_val = Setting.get("EMAIL_POLL_STARTED_AT", "")
+        lock = Setting.get_many(("EMAIL_POLL_RUNNING", "EMAIL_POLL_STARTED_AT"))
+        running_flag = lock.get("EMAIL_POLL_RUNNING") or "0"
+        started_at_val = lock.get("EMAIL_POLL_STARTED_AT") or ""
         if running_flag == "1" and started_at_val:
             try:
                 prev_dt = datetime.fromisoformat(started_at_val)
-                age = (datetime.utcnow().replace(tzinfo=timezone.utc) - prev_dt).total_seconds()
+                age = (datetime.now(timezone.utc) - prev_dt).total_seconds()
                 # Use 15 minutes as emergency stale threshold (independent of interval)
                 if age > 900:
-                    Setting.set("EMAIL_POLL_RUNNING", "0")
-                    Setting.set("EMAIL_POLL_LAST_RESULT", f"watchdog_cleared_stale_after_{int(age)}s")
+                    Setting.set_many({"EMAIL_POLL_RUNNING": "0", "EMAIL_POLL_LAST_RESULT": f"watchdog_cleared_stale_after_{int(age)}s"})
                     if logger:
                         logger.error("email_poll_watchdog: cleared stale poll lock age=%ss", int(age))
             except Exception:
                 # On parse failure just clear
-                Setting.set("EMAIL_POLL_RUNNING", "0")
-                Setting.set("EMAIL_POLL_LAST_RESULT", "watchdog_cleared_parse_error")
+                Setting.set_many({"EMAIL_POLL_RUNNING": "0", "EMAIL_POLL_LAST_RESULT": "watchdog_cleared_parse_error"})
                 if logger:
                     logger.error("email_poll_watchdog: cleared lock due to parse error")
     except Exception:
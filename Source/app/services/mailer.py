@@ -32,8 +32,12 @@ STALE_SENDING = timedelta(minutes=15)
 
 
 def enqueue_mail(to_address, subject, html_body, to_name=None, save_to_sent=True,
-                 attachments=None, category='other', ticket_id=None):
-    """Queue an email for background delivery. Drop-in for ms_graph.send_mail."""
+                 attachments=None, category='other', ticket_id=None, commit=True):
+    """Queue an email for background delivery. Drop-in for ms_graph.send_mail.
+
+    commit=False only adds the row to the session, so it is queued in the
+    caller's transaction (for scheduler jobs; no dev drain kick).
+    """
     if isinstance(to_address, (list, tuple, set)):
         addrs = [str(a).strip() for a in to_address if a and str(a).strip()]
     else:
@@ -51,6 +55,8 @@ def enqueue_mail(to_address, subject, html_body, to_name=None, save_to_sent=True
         ticket_id=ticket_id,
     )
     db.session.add(row)
+    if not commit:
+        return row
     db.session.commit()
     _kick_dev_drain()
     return row
@@ -70,7 +76,7 @@ def _kick_dev_drain():
 
 def drain_outbox(app, batch_size=25):
     """Send due queued emails. Safe to run concurrently across processes."""
-    from .ms_graph import send_mail
+    from .ms_graph import log_outgoing_batch, send_mail
     sent = 0
     with app.app_context():
         now = datetime.utcnow()
@@ -101,6 +107,7 @@ def drain_outbox(app, batch_size=25):
             if claimed.rowcount != 1:
                 continue  # another process claimed it first
             db.session.refresh(row)
+            log_rows = []
             try:
                 addrs = json.loads(row.to_json or '[]')
                 attachments = json.loads(row.attachments_json) if row.attachments_json else None
@@ -111,6 +118,7 @@ def drain_outbox(app, batch_size=25):
                     attachments=attachments,
                     category=row.category or 'other',
                     ticket_id=row.ticket_id,
+                    log_rows=log_rows,
                 )
                 err = None if ok else 'Send failed (see outgoing email log)'
             except Exception as e:
@@ -129,6 +137,8 @@ def drain_outbox(app, batch_size=25):
                     row.status = 'failed'
                     backoff = BACKOFF[min(max((row.attempts or 1) - 1, 0), len(BACKOFF) - 1)]
                     row.next_attempt_at = datetime.utcnow() + backoff
+            # OutgoingEmail log row goes in with the status update: one commit per email
+            log_outgoing_batch(log_rows)
             db.session.commit()
         if sent and app.logger:
             app.logger.info('Email outbox: sent %d message(s)', sent)
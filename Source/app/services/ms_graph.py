@@ -1,12 +1,34 @@
 import os
+import threading
 import msal
 import requests
+from datetime import datetime
 from typing import List, Dict, Optional
 from flask import current_app
 from app.models import Setting
 
 SCOPES = ["https://graph.microsoft.com/.default"]
 
+# Graph calls reuse a keep-alive connection pool instead of a new TCP/TLS
+# handshake per request. requests.Session isn't documented as thread-safe,
+# so each thread (scheduler workers, request threads) keeps its own.
+_local = threading.local()
+
+
+def _graph_session() -> requests.Session:
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = _local.session = requests.Session()
+    return session
+
+
+# MSAL keeps acquired tokens in the app object's in-memory cache, so building a
+# new app per call meant a round trip to Azure AD for every token. Keep one app
+# for the current credentials (rebuilt when they change in Settings).
+_msal_app_cache: Dict[tuple, msal.ConfidentialClientApplication] = {}
+_msal_lock = threading.Lock()
+
+
 def get_msal_app() -> Optional[msal.ConfidentialClientApplication]:
     # Prefer DB settings; fall back to environment
     client_id = Setting.get("MS_CLIENT_ID", None) or os.getenv("MS_CLIENT_ID")
@@ -14,8 +36,15 @@ def get_msal_app() -> Optional[msal.ConfidentialClientApplication]:
     tenant_id = Setting.get("MS_TENANT_ID", None) or os.getenv("MS_TENANT_ID", "common")
     if not client_id or not client_secret:
         return None
-    authority = f"https://login.microsoftonline.com/{tenant_id}"
-    return msal.ConfidentialClientApplication(client_id, authority=authority, client_credential=client_secret)
+    key = (client_id, client_secret, tenant_id)
+    with _msal_lock:
+        app = _msal_app_cache.get(key)
+        if app is None:
+            authority = f"https://login.microsoftonline.com/{tenant_id}"
+            app = msal.ConfidentialClientApplication(client_id, authority=authority, client_credential=client_secret)
+            _msal_app_cache.clear()
+            _msal_app_cache[key] = app
+    return app
 
 
 def get_access_token(app: msal.ConfidentialClientApplication) -> Optional[str]:
@@ -31,9 +60,16 @@ def get_access_token(app: msal.ConfidentialClientApplication) -> Optional[str]:
 
 def get_unread_messages(access_token: str, user_email: str) -> List[Dict]:
     headers = {"Authorization": f"Bearer {access_token}"}
-    # Get unread messages ordered by receivedDateTime desc
-    url = f"https://graph.microsoft.com/v1.0/users/{user_email}/mailFolders/Inbox/messages?$filter=isRead eq false&$orderby=receivedDateTime desc&$top=25"
-    resp = requests.get(url, headers=headers, timeout=30)
+    # Get unread messages ordered by receivedDateTime desc, with just the
+    # fields the poller reads; body and attachment metadata (not content)
+    # come inline so there's no per-message fetch or attachment listing
+    url = (
+        f"https://graph.microsoft.com/v1.0/users/{user_email}/mailFolders/Inbox/messages"
+        "?$filter=isRead eq false&$orderby=receivedDateTime desc&$top=25"
+        "&$select=id,subject,from,replyTo,body,bodyPreview,hasAttachments"
+        "&$expand=attachments($select=id,name,contentType,size)"
+    )
+    resp = _graph_session().get(url, headers=headers, timeout=30)
     resp.raise_for_status()
     data = resp.json()
     return data.get("value", [])
@@ -42,7 +78,7 @@ def get_unread_messages(access_token: str, user_email: str) -> List[Dict]:
 def get_message_html(access_token: str, user_email: str, message_id: str) -> Optional[str]:
     headers = {"Authorization": f"Bearer {access_token}"}
     url = f"https://graph.microsoft.com/v1.0/users/{user_email}/messages/{message_id}?$select=body"
-    resp = requests.get(url, headers=headers, timeout=20)
+    resp = _graph_session().get(url, headers=headers, timeout=20)
     if resp.status_code != 200:
         return None
     body = resp.json().get("body", {})
@@ -52,20 +88,25 @@ def get_message_html(access_token: str, user_email: str, message_id: str) -> Opt
 
 
 def list_attachments(access_token: str, user_email: str, message_id: str) -> List[Dict]:
+    """Attachment metadata for a message (no contentBytes; see download_attachment_to)."""
     headers = {"Authorization": f"Bearer {access_token}"}
-    url = f"https://graph.microsoft.com/v1.0/users/{user_email}/messages/{message_id}/attachments"
-    resp = requests.get(url, headers=headers, timeout=20)
+    url = f"https://graph.microsoft.com/v1.0/users/{user_email}/messages/{message_id}/attachments?$select=id,name,contentType,size"
+    resp = _graph_session().get(url, headers=headers, timeout=20)
     resp.raise_for_status()
     return resp.json().get("value", [])
 
 
-def download_file_attachment(access_token: str, user_email: str, attachment_id: str) -> Optional[Dict]:
+def download_attachment_to(access_token: str, user_email: str, message_id: str, attachment_id: str, fp) -> int:
+    """Stream an attachment's raw bytes into the open binary file fp; returns bytes written."""
     headers = {"Authorization": f"Bearer {access_token}"}
-    url = f"https://graph.microsoft.com/v1.0/users/{user_email}/attachments/{attachment_id}"
-    resp = requests.get(url, headers=headers, timeout=30)
-    if resp.status_code != 200:
-        return None
-    return resp.json()
+    url = f"https://graph.microsoft.com/v1.0/users/{user_email}/messages/{message_id}/attachments/{attachment_id}/$value"
+    written = 0
+    with _graph_session().get(url, headers=headers, stream=True, timeout=30) as resp:
+        resp.raise_for_status()
+        for chunk in resp.iter_content(64 * 1024):
+            fp.write(chunk)
+            written += len(chunk)
+    return written
 
 
 def mark_message_read(access_token: str, user_email: str, message_id: str):
@@ -74,10 +115,55 @@ def mark_message_read(access_token: str, user_email: str, message_id: str):
         "Content-Type": "application/json"
     }
     url = f"https://graph.microsoft.com/v1.0/users/{user_email}/messages/{message_id}"
-    requests.patch(url, headers=headers, json={"isRead": True}, timeout=20)
+    _graph_session().patch(url, headers=headers, json={"isRead": True}, timeout=20)
+
 
+# Graph accepts at most 20 subrequests per $batch call
+_GRAPH_BATCH_LIMIT = 20
 
-def send_mail(to_address, subject: str, html_body: str, to_name: Optional[str] = None, save_to_sent: bool = True, attachments: Optional[List[Dict]] = None, category: str = 'other', ticket_id: Optional[int] = None) -> bool:
+
+def mark_messages_read(access_token: str, user_email: str, message_ids: List[str]) -> None:
+    """Mark messages read with one Graph $batch request per 20 ids.
+
+    Ids whose batch (or individual subrequest) fails, e.g. when throttled,
+    are retried one at a time via mark_message_read().
+    """
+    headers = {
+        "Authorization": f"Bearer {access_token}",
+        "Content-Type": "application/json"
+    }
+    url = "https://graph.microsoft.com/v1.0/$batch"
+    for i in range(0, len(message_ids), _GRAPH_BATCH_LIMIT):
+        chunk = message_ids[i:i + _GRAPH_BATCH_LIMIT]
+        payload = {"requests": [
+            {
+                "id": str(n),
+                "method": "PATCH",
+                "url": f"/users/{user_email}/messages/{mid}",
+                "headers": {"Content-Type": "application/json"},
+                "body": {"isRead": True},
+            }
+            for n, mid in enumerate(chunk)
+        ]}
+        try:
+            resp = _graph_session().post(url, headers=headers, json=payload, timeout=20)
+            if resp.status_code == 200:
+                failed = [
+                    chunk[int(r["id"])] for r in resp.json().get("responses", [])
+                    if int(r.get("status", 500)) >= 400
+                ]
+            else:
+                failed = chunk
+        except (requests.RequestException, ValueError, KeyError):
+            failed = chunk
+        for mid in failed:
+            try:
+                mark_message_read(access_token, user_email, mid)
+            except requests.RequestException:
+                pass
+
+
+def send_mail(to_address, subject: str, html_body: str, to_name: Optional[str] = None, save_to_sent: bool = True, attachments: Optional[List[Dict]] = None, category: str = 'other', ticket_id: Optional[int] = None, log_rows: Optional[List[Dict]] = None) -> bool:
     """Send an email via Microsoft Graph using the configured mailbox user.
 
     Returns True on success, False otherwise.
@@ -88,6 +174,8 @@ def send_mail(to_address, subject: str, html_body: str, to_name: Optional[str] =
         category: Type of email for logging. Options: 'ticket_note', 'ticket_assigned',
                   'ticket_watch', 'password_expiry', 'approval_request', 'po_sent', 'other'
         ticket_id: Related ticket ID if applicable
+        log_rows: If given, the OutgoingEmail log row is appended here instead of
+                  committed immediately; write a burst with log_outgoing_batch().
     """
     user_email = Setting.get("MS_USER_EMAIL", None) or os.getenv("MS_USER_EMAIL")
     app = get_msal_app()
@@ -145,41 +233,59 @@ def send_mail(to_address, subject: str, html_body: str, to_name: Optional[str] =
     try:
         if current_app:
             current_app.logger.info("Graph send_mail: to=%s subj=%s attachments=%d", log_to, subject, len(message.get("attachments", [])))
-        resp = requests.post(url, headers=headers, json=payload, timeout=25)
+        resp = _graph_session().post(url, headers=headers, json=payload, timeout=25)
         if current_app:
             current_app.logger.info("Graph send_mail: status=%s", resp.status_code)
             if resp.status_code >= 300:
                 current_app.logger.warning("Graph send_mail error body: %s", resp.text[:1000])
         success = resp.status_code in (202, 200)
         # Log outgoing email
-        _log_outgoing_email(log_to, to_name, subject, category, ticket_id, success, None if success else resp.text[:500] if resp.text else 'Unknown error')
+        _log_outgoing_email(log_to, to_name, subject, category, ticket_id, success, None if success else resp.text or 'Unknown error', log_rows)
         return success
     except requests.RequestException as e:
         if current_app:
             current_app.logger.exception("Graph send_mail exception: %s", e)
         # Log failed outgoing email
-        _log_outgoing_email(log_to, to_name, subject, category, ticket_id, False, str(e)[:500])
+        _log_outgoing_email(log_to, to_name, subject, category, ticket_id, False, str(e), log_rows)
         return False
 
 
-def _log_outgoing_email(to_address: str, to_name: Optional[str], subject: str, category: str, ticket_id: Optional[int], success: bool, error_message: Optional[str]) -> None:
-    """Log an outgoing email to the database."""
+def _log_outgoing_email(to_address: str, to_name: Optional[str], subject: str, category: str, ticket_id: Optional[int], success: bool, error_message: Optional[str], log_rows: Optional[List[Dict]] = None) -> None:
+    """Log an outgoing email to the database (or buffer it in log_rows)."""
+    row = dict(
+        to_address=(to_address or '')[:255],
+        to_name=(to_name or None) and to_name[:255],
+        subject=subject[:500] if subject else '',
+        category=category,
+        ticket_id=ticket_id,
+        success=success,
+        error_message=error_message,
+        created_at=datetime.utcnow(),
+    )
+    if log_rows is not None:
+        log_rows.append(row)
+        return
     try:
         from app.models import OutgoingEmail
         from app import db
         
-        log_entry = OutgoingEmail(
-            to_address=(to_address or '')[:255],
-            to_name=(to_name or None) and to_name[:255],
-            subject=subject[:500] if subject else '',
-            category=category,
-            ticket_id=ticket_id,
-            success=success,
-            error_message=error_message
-        )
-        db.session.add(log_entry)
+        db.session.add(OutgoingEmail(**row))
         db.session.commit()
     except Exception as e:
         # Don't let logging failures break email sending
         if current_app:
             current_app.logger.warning("Failed to log outgoing email: %s", e)
+
+
+def log_outgoing_batch(rows: List[Dict]) -> None:
+    """Insert OutgoingEmail rows buffered by send_mail(log_rows=...) in one executemany.
+
+    Runs in the caller's transaction; the caller commits (or rolls back
+    together with whatever it recorded about those sends).
+    """
+    if not rows:
+        return
+    from app.models import OutgoingEmail
+    from app import db
+    
+    db.session.execute(db.insert(OutgoingEmail), rows)
@@ -24,6 +24,8 @@ def ensure_ticket_columns(engine):
     'system_info_json': "TEXT",
     'merged_into_id': "INTEGER",
     'merged_at': "DATETIME",
+    'assignee_name_cached': "TEXT",
+    'co_assignee_name_cached': "TEXT",
     }
 
     with engine.connect() as conn:
@@ -32,6 +34,14 @@ def ensure_ticket_columns(engine):
         for col, coltype in required.items():
             if col not in existing:
                 conn.execute(text(f"ALTER TABLE ticket ADD COLUMN {col} {coltype}"))
+        # One-time backfill of the denormalized assignee names
+        for prefix in ('assignee', 'co_assignee'):
+            if f'{prefix}_name_cached' not in existing:
+                conn.execute(text(
+                    f"UPDATE ticket SET {prefix}_name_cached = "
+                    f"(SELECT name FROM user WHERE user.id = ticket.{prefix}_id) "
+                    f"WHERE {prefix}_id IS NOT NULL"
+                ))
         conn.commit()
 
 
@@ -284,9 +294,33 @@ def ensure_order_tables(engine):
                 ('shipping_state', 'TEXT'),
                 ('shipping_zip', 'TEXT'),
                 ('shipping_cost', 'REAL'),
+                ('subtotal_cached', 'REAL'),
+                ('tax_cached', 'REAL'),
+                ('grand_total_cached', 'REAL'),
             ]:
                 if col not in existing_po_cols:
                     conn.execute(text(f"ALTER TABLE purchase_order ADD COLUMN {col} {ddl}"))
+            sl_cols = {row[1] for row in conn.execute(text("PRAGMA table_info('shipping_location')")).fetchall()}
+            if 'grand_total_cached' not in existing_po_cols and 'tax_rate' in sl_cols:
+                # Backfill the denormalized totals once for existing POs
+                conn.execute(text(
+                    """
+                    UPDATE purchase_order SET subtotal_cached = (
+                        SELECT COALESCE(SUM(COALESCE(oi.est_unit_cost, 0) * COALESCE(oi.quantity, 0)), 0)
+                        FROM order_item oi WHERE oi.po_id = purchase_order.id
+                    )
+                    """
+                ))
+                conn.execute(text(
+                    """
+                    UPDATE purchase_order SET tax_cached = subtotal_cached * COALESCE((
+                        SELECT sl.tax_rate FROM shipping_location sl WHERE sl.id = purchase_order.shipping_location_id
+                    ), 0)
+                    """
+                ))
+                conn.execute(text(
+                    "UPDATE purchase_order SET grand_total_cached = subtotal_cached + tax_cached + COALESCE(shipping_cost, 0)"
+                ))
         # order_item
         exists_item = conn.execute(text("SELECT name FROM sqlite_master WHERE type='table' AND name='order_item'")).fetchone() is not None
         if not exists_item:
@@ -578,6 +612,8 @@ def ensure_contact_columns(engine):
         'archived': 'BOOLEAN',
         'password_expires_days': 'INTEGER',
         'password_checked_at': 'DATETIME',
+        'password_last_set_at': 'DATETIME',
+        'password_expires_at': 'DATETIME',
         'password_notification_sent_at': 'DATETIME',
         'last_notification_days_before': 'INTEGER',
         'ad_disabled': 'BOOLEAN',
@@ -592,6 +628,24 @@ def ensure_contact_columns(engine):
         for col, coltype in required.items():
             if col not in existing:
                 conn.execute(text(f"ALTER TABLE contact ADD COLUMN {col} {coltype}"))
+        # Contact.email is normalized on write; bring older mixed-case rows in
+        # line, skipping any whose lowercased form would collide with another
+        # contact (UNIQUE) so those can be merged by hand. Compared in Python
+        # with the validator's .strip().lower(): SQL trim() only strips spaces
+        pending = {}
+        existing_lower = set()
+        for cid, email in conn.execute(text("SELECT id, email FROM contact WHERE email IS NOT NULL")):
+            normalized = email.strip().lower()
+            if email == normalized:
+                existing_lower.add(email)
+            else:
+                pending.setdefault(normalized, []).append(cid)
+        for normalized, ids in pending.items():
+            if len(ids) == 1 and normalized not in existing_lower:
+                conn.execute(
+                    text("UPDATE contact SET email = :email WHERE id = :id"),
+                    {'email': normalized, 'id': ids[0]},
+                )
         conn.commit()
 
 
@@ -990,6 +1044,40 @@ def ensure_ai_tables(engine):
         conn.commit()
 
 
+# (index name, table, column list) — mirrors the db.Index entries declared in
+# models.py __table_args__; create_all only builds those for brand-new tables.
+QUERY_INDEXES = [
+    ('ix_ticket_assignee_status', 'ticket', 'assignee_id, status'),
+    ('ix_orderitem_po', 'order_item', 'po_id, status'),
+    ('ix_ponote_po_created', 'po_note', 'po_id, created_at'),
+    ('ix_contact_email_lower', 'contact', 'lower(email)'),
+    ('ix_asset_serial_lower', 'asset', 'lower(serial_number)'),
+    ('ix_asset_tag_lower', 'asset', 'lower(asset_tag)'),
+    # Optional 4th element: partial-index predicate
+    ('ix_ticket_live', 'ticket', 'status, snoozed_until, created_at', 'project_id IS NULL AND merged_into_id IS NULL'),
+    ('ix_outgoing_emails_failed', 'outgoing_emails', 'created_at', 'success = 0'),
+]
+
+# Superseded indexes, dropped from existing DBs
+RETIRED_INDEXES = [
+    'ix_ticket_list_default',  # replaced by the partial ix_ticket_live
+    'ix_ticket_watchers_ticket_id',  # prefix of uq_ticket_watcher's index
+]
+
+
+def ensure_query_indexes(engine):
+    """Create the composite/covering indexes used by hot list queries on existing DBs."""
+    with engine.connect() as conn:
+        for name, table, cols, *where in QUERY_INDEXES:
+            exists = conn.execute(text("SELECT name FROM sqlite_master WHERE type='table' AND name=:t"), {'t': table}).fetchone() is not None
+            if exists:
+                predicate = f" WHERE {where[0]}" if where else ""
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({cols}){predicate}"))
+        for name in RETIRED_INDEXES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        conn.commit()
+
+
 def seed_builtin_roles(db):
     """Seed Administrator/Technician roles and backfill user.role_id. Idempotent."""
     import json as _json
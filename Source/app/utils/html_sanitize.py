@@ -7,7 +7,11 @@ Single source of truth for the bleach allowlists used across the app:
   untouched so the template's preserve-ws branch keeps rendering it escaped)
 - sanitize_email_html: inbound email bodies (wider allowlist so real emails
   stay readable: images, tables, safe inline styles)
+- plain_text_to_html: plain text (e.g. emailed replies) escaped, with line
+  breaks and clickable links
+- ESCAPE_BR_TABLE: str.translate table for the escape + <br> step alone
 """
+import threading
 import bleach
 
 RICH_TEXT_TAGS = [
@@ -21,6 +25,9 @@ RICH_TEXT_ATTRS = {
 }
 ALLOWED_PROTOCOLS = ['http', 'https', 'mailto']
 
+# html.escape() plus newline -> <br> in one str.translate pass
+ESCAPE_BR_TABLE = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#x27;', '\n': '<br>'})
+
 # Documents keep Bootstrap table classes inserted by the toolbar editor.
 DOCUMENT_ATTRS = dict(RICH_TEXT_ATTRS)
 DOCUMENT_ATTRS['table'] = ['class']
@@ -67,17 +74,50 @@ def _set_target_rel(attrs, new=False):
     return attrs
 
 
+# bleach.clean()/linkify() build a Cleaner/Linker (and its html5lib parser)
+# on every call. Those objects are reusable but not thread-safe, so each
+# thread keeps its own, built on first use.
+_local = threading.local()
+
+
+def _linker():
+    linker = getattr(_local, 'linker', None)
+    if linker is None:
+        linker = _local.linker = bleach.Linker(callbacks=[_set_target_rel])
+    return linker
+
+
+def _cleaner(tags, attrs, protocols, css_sanitizer=None):
+    cleaners = getattr(_local, 'cleaners', None)
+    if cleaners is None:
+        cleaners = _local.cleaners = {}
+    key = (
+        tuple(tags),
+        tuple((k, tuple(v)) for k, v in attrs.items()),
+        tuple(protocols),
+        css_sanitizer is not None,
+    )
+    cleaner = cleaners.get(key)
+    if cleaner is None:
+        cleaner = cleaners[key] = bleach.Cleaner(
+            tags=tags,
+            attributes=attrs,
+            protocols=protocols,
+            strip=True,
+            css_sanitizer=css_sanitizer,
+        )
+    return cleaner
+
+
 def sanitize_rich_text(raw, tags=None, attrs=None, protocols=None, linkify=True):
     """Bleach + linkify with the standard rich-text allowlist."""
-    cleaned = bleach.clean(
-        raw or '',
-        tags=tags or RICH_TEXT_TAGS,
-        attributes=attrs or RICH_TEXT_ATTRS,
-        protocols=protocols or ALLOWED_PROTOCOLS,
-        strip=True
-    )
+    cleaned = _cleaner(
+        tags or RICH_TEXT_TAGS,
+        attrs or RICH_TEXT_ATTRS,
+        protocols or ALLOWED_PROTOCOLS,
+    ).clean(raw or '')
     if linkify:
-        cleaned = bleach.linkify(cleaned, callbacks=[_set_target_rel])
+        cleaned = _linker().linkify(cleaned)
     return cleaned
 
 
@@ -100,15 +140,10 @@ def sanitize_ticket_body(raw):
 
 def sanitize_email_html(raw):
     """Sanitize inbound email HTML with the email-friendly allowlist."""
-    kwargs = {}
-    if _CSS_SANITIZER is not None:
-        kwargs['css_sanitizer'] = _CSS_SANITIZER
-    cleaned = bleach.clean(
-        raw or '',
-        tags=EMAIL_TAGS,
-        attributes=EMAIL_ATTRS,
-        protocols=EMAIL_PROTOCOLS,
-        strip=True,
-        **kwargs
-    )
-    return cleaned
+    return _cleaner(EMAIL_TAGS, EMAIL_ATTRS, EMAIL_PROTOCOLS, _CSS_SANITIZER).clean(raw or '')
+
+
+def plain_text_to_html(text):
+    """Escape plain text, keep its line breaks and linkify bare URLs."""
+    escaped = (text or '').translate(ESCAPE_BR_TABLE)
+    return _linker().linkify(escaped)
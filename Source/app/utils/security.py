@@ -3,6 +3,7 @@ from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 import base64
+import functools
 import os
 import secrets
 
@@ -74,12 +75,18 @@ def _get_encryption_key(secret_key: str) -> bytes:
     return key
 
 
+@functools.lru_cache(maxsize=8)
+def _fernet_for_key(secret_key: str) -> Fernet:
+    # Key derivation is 100k PBKDF2 rounds; do it once per SECRET_KEY, not per value.
+    return Fernet(_get_encryption_key(secret_key))
+
+
 def _get_fernet(secret_key: str = None) -> Fernet:
     """Get a Fernet cipher instance using the app's SECRET_KEY."""
     if secret_key is None:
         from flask import current_app
         secret_key = current_app.config.get('SECRET_KEY', 'dev')
-    return Fernet(_get_encryption_key(secret_key))
+    return _fernet_for_key(secret_key)
 
 
 def encrypt_value(plaintext: str, secret_key: str = None) -> str:
@@ -113,6 +120,25 @@ def decrypt_value(encrypted_value: str, secret_key: str = None) -> str:
         return encrypted_value
     try:
         fernet = _get_fernet(secret_key)
+    except Exception:
+        return ''
+    return _decrypt_with(fernet, encrypted_value)
+
+
+def decrypt_many(values, secret_key: str = None) -> list:
+    """decrypt_value() over a list, resolving the cipher once for the batch."""
+    values = list(values)
+    if not any(is_encrypted(v) for v in values):
+        return values
+    try:
+        fernet = _get_fernet(secret_key)
+    except Exception:
+        return [v if not is_encrypted(v) else '' for v in values]
+    return [_decrypt_with(fernet, v) if is_encrypted(v) else v for v in values]
+
+
+def _decrypt_with(fernet: Fernet, encrypted_value: str) -> str:
+    try:
         encrypted_data = encrypted_value[len(ENCRYPTED_PREFIX):]
         decrypted = fernet.decrypt(encrypted_data.encode('utf-8'))
         return decrypted.decode('utf-8')